@@ -0,0 +1,273 @@
+#!/usr/bin/env python
+"""
+Filename: animation.py
+Author: Lukas Singer <lukas42singer (at) gmail (dot) com>
+Created: 2026/10/18
+Copyright: 2026, Lukas Singer
+License: WTFPL (see COPYING or <http://www.wtfpl.net/>)
+Description: Renders zoom animations.
+
+  the animation goes through a list of keyframes (views), the zoom speed
+  between two keyframes is constant. the frames are rendered in a pipeline
+  of three threads:
+
+    iterate -> color -> write
+
+  numpy and the png encoder release the gil, so the stages run at the same
+  time. at most QUEUE_SIZE frames wait between two stages, so the memory
+  does not grow with the number of frames.
+
+  the pixels of a frame are resampled from the frame before: a pixel gets
+  the iteration count of the nearest pixel of the frame before if all its
+  neighbours have got the same count, like the rectangles of the
+  subdivision mode (see render.py). only the rest is iterated. a count is
+  passed on for at most REUSE_AGE frames, so the details which appear
+  between the pixels of a frame are found a few frames later.
+"""
+
+import decimal
+import queue
+import threading
+
+import numpy as np
+
+import complex_plane
+import deep_zoom
+import palette
+import render
+
+# the number of frames waiting between two stages of the pipeline
+QUEUE_SIZE = 2
+
+# the most frames a reused iteration count is passed on, see _reuse()
+REUSE_AGE = 8
+
+
+def views(keyframes, frames):
+    """ yields the views (start, end) of frames frames going through all
+    keyframes, a list of views (start, end). the frames are spread evenly
+    over the keyframes. between two keyframes the view shrinks (or grows)
+    by the same factor from frame to frame, and the point which does not
+    move on the screen is the one the zoom heads to. the corners are
+    deep_zoom.Points. all keyframes need the orientation of the first one,
+    a zoom can't turn the view over.
+    """
+    keyframes = [tuple(deep_zoom.Point.from_complex(z) for z in view)
+                 for view in keyframes]
+    for n in (0, 1):
+        signs = set((view[1][n] > view[0][n]) - (view[1][n] < view[0][n])
+                    for view in keyframes)
+        if len(signs) > 1:
+            raise ValueError('the keyframes are {} in different directions'
+                             .format(('wide', 'high')[n]))
+    if len(keyframes) == 1:
+        keyframes *= 2
+    segments = len(keyframes) - 1
+    for n in range(frames):
+        with deep_zoom.context(*keyframes[0]):
+            u = (decimal.Decimal(n * segments) / max(frames - 1, 1))
+        k = min(int(u), segments - 1)
+        yield _interpolate(keyframes[k], keyframes[k + 1], u - k)
+
+
+def _interpolate(a, b, t):
+    # the sizes change exponentially: size(t) = size(a) * ratio ** t.
+    # the center moves so that the fixed point of the zoom (the point
+    # which has got the same pixel coordinates in all frames) is
+    #   center(a) + (center(b) - center(a)) / (1 - ratio).
+    digits = max(deep_zoom.precision(*a), deep_zoom.precision(*b))
+    with decimal.localcontext(prec=digits):
+        ca = [(a[0][n] + a[1][n]) / 2 for n in (0, 1)]
+        cb = [(b[0][n] + b[1][n]) / 2 for n in (0, 1)]
+        sa = [a[1][n] - a[0][n] for n in (0, 1)]
+        sb = [b[1][n] - b[0][n] for n in (0, 1)]
+        size = [s0 * _power(s1 / s0, t) if s0 else s1
+                for s0, s1 in zip(sa, sb)]
+        ratio = sb[0] / sa[0] if sa[0] else 1
+        if ratio == 1:
+            move = t
+        else:
+            move = (1 - _power(ratio, t)) / (1 - ratio)
+        center = [c0 + (c1 - c0) * move for c0, c1 in zip(ca, cb)]
+        return (deep_zoom.Point(center[0] - size[0] / 2,
+                                center[1] - size[1] / 2),
+                deep_zoom.Point(center[0] + size[0] / 2,
+                                center[1] + size[1] / 2))
+
+
+def _power(x, t):
+    """ returns x ** t for decimals, x > 0 """
+    if t == 0:
+        return decimal.Decimal(1)
+    return (x.ln() * t).exp()
+
+
+def animate(keyframes, frames, width, height, output,
+            coloring, bailout=2.0, itermax=256, parameter=None,
+            engine=None, progress=None):
+    """ renders an animation of frames frames through the keyframes (see
+    views()) of the mandelbrot set (parameter is None) or of the julia set
+    of the parameter and writes the frames to output: either a format
+    string for the frame files ('frame{:05d}.png') or a binary file object
+    which gets the raw rgb bytes of all frames one after another (e.g.
+    sys.stdout.buffer piped to 'ffmpeg -f rawvideo -pix_fmt rgb24 ...').
+    progress is called with the number of written frames after every frame,
+    it may raise render.Cancelled.
+    returns the statistics of all frames (see ComplexPlane.statistics),
+    'reused' counts the pixels resampled from the frame before.
+    """
+    keyframes = list(keyframes)
+    # the distance colorings need the distances
+    distance = hasattr(coloring, 'distance')
+    stop = threading.Event()
+    iterated = queue.Queue(QUEUE_SIZE)
+    colored = queue.Queue(QUEUE_SIZE)
+
+    def iterate():
+        previous = previous_ages = None
+        for start, end in views(keyframes, frames):
+            plane = complex_plane.ComplexPlane(width, height, start, end)
+            plane.init_field(itermax, parameter, bailout, distance=distance)
+            known = np.zeros((height, width), dtype=bool)
+            ages = np.zeros((height, width), dtype=np.uint8)
+            if previous is not None:
+                _reuse(plane, previous, previous_ages, known, ages)
+            render.fill(plane, bailout, itermax, parameter, known, engine)
+            previous, previous_ages = plane, ages
+            if not _put(iterated, plane, stop):
+                return False
+
+    def color():
+        while True:
+            plane = _get(iterated, stop)
+            if not isinstance(plane, complex_plane.ComplexPlane):
+                # the end or an error of the iterate stage
+                _put(colored, plane, stop)
+                return False
+            palette.colorize(plane, coloring)
+            if not _put(colored, plane, stop):
+                return False
+
+    threads = [threading.Thread(target=_stage, args=(iterate, iterated, stop),
+                                daemon=True),
+               threading.Thread(target=_stage, args=(color, colored, stop),
+                                daemon=True)]
+    for thread in threads:
+        thread.start()
+    statistics = None
+    try:
+        for n in range(frames):
+            plane = colored.get()
+            if isinstance(plane, BaseException):
+                raise plane
+            if statistics is None:
+                statistics = plane.statistics
+            else:
+                statistics.update(plane.statistics)
+            _write(plane, output, n)
+            if progress:
+                progress(n + 1)
+    finally:
+        stop.set()
+        for q in (iterated, colored):
+            # unblock the stages waiting for room in the queues
+            while not q.empty():
+                q.get_nowait()
+        for thread in threads:
+            thread.join()
+    return statistics
+
+
+# the end of a stage, see _stage()
+_DONE = object()
+
+
+def _stage(function, out, stop):
+    """ runs a stage of the pipeline, the errors are passed down the
+    pipeline.
+    """
+    try:
+        if function() is not False:
+            _put(out, _DONE, stop)
+    except BaseException as e:
+        _put(out, e, stop)
+
+
+def _put(q, item, stop):
+    """ puts item into the queue q, returns False if the pipeline was
+    stopped
+    """
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _get(q, stop):
+    """ returns the next item of the queue q, or _DONE if the pipeline was
+    stopped
+    """
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            pass
+    return _DONE
+
+
+def _write(plane, output, n):
+    if isinstance(output, str):
+        plane.get_pil_image().convert('RGB').save(output.format(n))
+    else:
+        output.write(plane.pixels[:, :, :3].tobytes())
+
+
+def _reuse(plane, previous, previous_ages, known, ages):
+    """ copies the iteration field of the pixels of previous (the frame
+    before) to the pixels of plane whose nearest pixel of previous has got
+    the same iteration count as its eight neighbours, and marks them known.
+    ages are the numbers of frames the counts were passed on (0 for the
+    iterated pixels), the ones of REUSE_AGE are not passed on. with
+    distances only the pixels far from the set are copied (see
+    render.SUBDIVISION_DISTANCE), the others would change their colors.
+    """
+    start, delta, digits = deep_zoom.frame(plane)
+    previous_start, previous_delta, _ = deep_zoom.frame(previous)
+    counts = previous.iterations
+    center = counts[1:-1, 1:-1]
+    uniform = np.zeros(counts.shape, dtype=bool)
+    uniform[1:-1, 1:-1] = previous_ages[1:-1, 1:-1] < REUSE_AGE
+    for dy in (0, 1, 2):
+        for dx in (0, 1, 2):
+            uniform[1:-1, 1:-1] &= (
+                counts[dy:dy + center.shape[0], dx:dx + center.shape[1]]
+                == center)
+    if previous.distances is not None:
+        uniform &= previous.distances >= (render.SUBDIVISION_DISTANCE
+                                          * abs(float(delta.real)))
+    # the nearest pixel of previous of the pixel x of plane is
+    # round(offset + x * scale), the same for y.
+    pixels = []
+    with decimal.localcontext(prec=digits):
+        for n in (0, 1):
+            offset = float((start[n] - previous_start[n]) / previous_delta[n])
+            scale = float(delta[n] / previous_delta[n])
+            nearest = np.rint(offset + np.arange(plane.size[n]) * scale)
+            inside = np.flatnonzero((nearest >= 0)
+                                    & (nearest < previous.size[n]))
+            pixels.append((inside, nearest[inside].astype(np.intp)))
+    (xs, previous_xs), (ys, previous_ys) = pixels
+    rows, columns = np.nonzero(uniform[np.ix_(previous_ys, previous_xs)])
+    ys, xs = ys[rows], xs[columns]
+    previous_ys, previous_xs = previous_ys[rows], previous_xs[columns]
+    plane.iterations[ys, xs] = counts[previous_ys, previous_xs]
+    plane.values[ys, xs] = previous.values[previous_ys, previous_xs]
+    if plane.distances is not None:
+        plane.distances[ys, xs] = previous.distances[previous_ys,
+                                                     previous_xs]
+    ages[ys, xs] = previous_ages[previous_ys, previous_xs] + 1
+    known[ys, xs] = True
+    plane.statistics['reused'] += int(ys.size)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+"""
+Filename: antialias.py
+Author: Lukas Singer <lukas42singer (at) gmail (dot) com>
+Created: 2026/10/18
+Copyright: 2026, Lukas Singer
+License: WTFPL (see COPYING or <http://www.wtfpl.net/>)
+Description: Adaptive anti-aliasing of rendered planes.
+
+  a rendered plane has got one sample per pixel. the pixels whose color
+  differs from the color of one of their neighbours by more than a
+  threshold are on an edge, only these are sampled again at jittered
+  points inside the pixel and get the average color of all samples.
+  so the cost grows with the length of the edges and not with the size
+  of the image, the flat parts of an image are not sampled again.
+
+    plane = mandelbrot.mandelbrot(800, 600, start, end, coloring)
+    antialias.antialias(plane, coloring)
+    print(antialias.summary(plane))
+"""
+
+import numpy as np
+
+import julia
+import mandelbrot
+import palette
+import render
+
+# the number of extra samples of an edge pixel
+SAMPLES = 8
+
+# a pixel is on an edge if one of its colors (r, g or b) differs by more
+# than THRESHOLD from the color of a neighbour, or if its iteration count
+# differs by more than ITERATION_THRESHOLD (None: only the colors count).
+THRESHOLD = 32
+ITERATION_THRESHOLD = None
+
+# the seed of the jitter, the same plane always gets the same samples
+SEED = 0
+
+# the pairs of neighbours (dy, dx) compared by edges(), every pixel is
+# compared with all 8 neighbours.
+_NEIGHBOURS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+def edges(plane, threshold=THRESHOLD, iteration_threshold=None):
+    """ returns a boolean mask of the pixels of the rendered plane which
+    are on an edge (see THRESHOLD)
+    """
+    height, width = plane.pixels.shape[:2]
+    mask = np.zeros((height, width), dtype=bool)
+    rgb = plane.pixels[:, :, :3].astype(np.int16)
+    if iteration_threshold is not None:
+        iterations = plane.iterations.astype(np.int64)
+    for dy, dx in _NEIGHBOURS:
+        a = (slice(0, height - dy), slice(max(-dx, 0), width - max(dx, 0)))
+        b = (slice(dy, height), slice(max(dx, 0), width - max(-dx, 0)))
+        edge = (np.abs(rgb[a] - rgb[b]) > threshold).any(axis=2)
+        if iteration_threshold is not None:
+            edge |= (np.abs(iterations[a] - iterations[b])
+                     > iteration_threshold)
+        mask[a] |= edge
+        mask[b] |= edge
+    return mask
+
+
+def antialias(plane, coloring, samples=SAMPLES, threshold=THRESHOLD,
+              iteration_threshold=ITERATION_THRESHOLD, engine=None,
+              progress=None):
+    """ samples the edge pixels (see edges()) of the rendered plane samples
+    times more and colors them with the average color of their samples.
+    coloring has to be the coloring the plane was rendered with (None is
+    the default coloring of the fractal). the samples are iterated by the
+    engine in the precision of the plane (see render.evaluator()).
+    only the pixels change, the iteration field keeps one sample per pixel,
+    so a recolored plane is not anti-aliased anymore.
+    progress is called with the plane and the finished fraction, it may
+    raise render.Cancelled.
+    the number of 'antialiased' pixels and of their extra 'samples' are
+    counted in the statistics of the plane (see summary()).
+    """
+    if samples < 1:
+        return plane
+    if not coloring:
+        coloring = (mandelbrot.DEFAULT_COLORING if plane.parameter is None
+                    else julia.DEFAULT_COLORING)
+    with plane.metrics.stage('antialias'):
+        ys, xs = np.nonzero(edges(plane, threshold, iteration_threshold))
+        evaluate = render.evaluator(plane, plane.bailout or 2.0,
+                                    plane.itermax, plane.parameter,
+                                    engine or render.DEFAULT_ENGINE)
+        if hasattr(coloring, 'histogram'):
+            # the colors depend on the whole plane, not on the samples
+            table = coloring.histogram(palette.histogram(plane.iterations,
+                                                         plane.itermax))
+        else:
+            table = None
+        rng = np.random.default_rng(SEED)
+        chunk = max(1, render.FILL_SIZE // samples)
+        for n in range(0, ys.size, chunk):
+            pys, pxs = ys[n:n + chunk], xs[n:n + chunk]
+            dys, dxs = _jitter(len(pys), samples, rng)
+            sample_ys = pys[:, np.newaxis] + dys
+            sample_xs = pxs[:, np.newaxis] + dxs
+            result = evaluate(sample_xs, sample_ys)
+            z, counts = result[:2]
+            distances = (palette.pixel_distances(plane, result[2])
+                         if len(result) > 2 else None)
+            if table is not None:
+                rgb = table[counts]
+            elif plane.parameter is None:
+                rgb = palette.colors(coloring, counts, plane.itermax,
+                                     plane.points(sample_xs, sample_ys),
+                                     np.abs(z), distances)
+            else:
+                rgb = palette.colors(coloring, counts, plane.itermax,
+                                     plane.parameter, np.abs(z), distances)
+            # the sample of the first render counts as well
+            total = rgb.sum(axis=1) + plane.pixels[pys, pxs, :3]
+            plane.pixels[pys, pxs, :3] = np.rint(total / (samples + 1))
+            plane.statistics['iterated'] += counts.size
+            if progress:
+                progress(plane, (n + len(pys)) / ys.size)
+        plane.statistics['antialiased'] += int(ys.size)
+        plane.statistics['samples'] += int(ys.size) * samples
+    return plane
+
+
+def _jitter(count, samples, rng):
+    """ returns the offsets (dy, dx) of samples samples in each of count
+    pixels as two arrays of shape (count, samples). the pixel is divided
+    into k x k cells (k * k >= samples), every sample is at a random point
+    in another cell, so the samples cover the pixel evenly.
+    """
+    k = int(np.ceil(np.sqrt(samples)))
+    cells = np.argsort(rng.random((count, k * k)), axis=1)[:, :samples]
+    dy = (cells // k + rng.random((count, samples))) / k - 0.5
+    dx = (cells % k + rng.random((count, samples))) / k - 0.5
+    return dy, dx
+
+
+def summary(plane):
+    """ returns a text about the extra work of antialias() """
+    pixels = plane.size[0] * plane.size[1]
+    antialiased = plane.statistics['antialiased']
+    samples = plane.statistics['samples']
+    return ('antialiased {} of {} pixels ({:.1%}) with {} extra samples, '
+            '{:.0%} of a render'.format(antialiased, pixels,
+                                        antialiased / pixels, samples,
+                                        samples / pixels))
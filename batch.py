@@ -0,0 +1,327 @@
+#!/usr/bin/env python
+"""
+Filename: batch.py
+Author: Lukas Singer <lukas42singer (at) gmail (dot) com>
+Created: 2026/10/18
+Copyright: 2026, Lukas Singer
+License: WTFPL (see COPYING or <http://www.wtfpl.net/>)
+Description: Renders fractals from the command line, without tk.
+
+  python -m chaos render mandelbrot --size 800x600 -o mandelbrot.png
+  python -m chaos render julia --parameter=-0.12,0.75 --coloring 'Modulo 3'
+  python -m chaos render julia --sweep 8x6 --size 64x48 -o sheet.png
+  python -m chaos render --jobs jobs.json
+
+  complex numbers are written as 're,im' (use --start=-2,1 for negative
+  numbers). the parts are read as decimals, so deep zooms keep their
+  precision.
+
+  a job file is a json list of jobs, all jobs are rendered in this process.
+  a job is an object with the keys of the long options, e.g.
+
+    [{"fractal": "mandelbrot", "size": "800x600", "max_iter": 500,
+      "start": ["-0.75", "0.11"], "end": "-0.74,0.1",
+      "output": "detail.png"},
+     {"fractal": "julia", "parameter": [-0.8, 0.156],
+      "coloring": "Modulo 3", "output": "julia.png"}]
+
+  a max_iter of 'auto' is estimated for the view from a probe of it (see
+  render.estimate_itermax()).
+
+  --precision is one of render.PRECISIONS or 'auto', doubles or the
+  precision a deep zoom needs (see render.choose_precision()). 'single' is
+  faster, but a few iteration counts differ, and zooms too deep for it get
+  doubles.
+
+  --sweep renders the julia sets of a grid of parameters (over the view
+  --sweep-start to --sweep-end, the whole mandelbrot set by default) into a
+  contact sheet, or into one file per parameter if the output is a format
+  string like 'julia{:03d}.png'.
+
+  --antialias SAMPLES anti-aliases the edges of the images with SAMPLES
+  extra samples per edge pixel (see antialias.py). it is off by default,
+  unlike the export of the user interface, it makes a render a few times
+  slower.
+
+  --poster renders images which don't fit into the memory tile by tile
+  through a file on disk (see poster.py), e.g. for prints:
+
+    python -m chaos render mandelbrot --size 60000x40000 --poster
+
+  a killed poster render continues where it stopped when it is started
+  again. posters are not anti-aliased.
+
+  with --cache the iteration fields are kept in the cache of the user
+  interface, views which were rendered before are only colored.
+
+  missing keys get the defaults of the options. the defaults are the ones
+  of the user interface or the ones of a settings file saved by it
+  (--settings FILE).
+"""
+
+import argparse
+import collections
+import decimal
+import json
+import sys
+import time
+
+import antialias
+import cache
+import coloring
+import deep_zoom
+import julia
+import mandelbrot
+import parallel
+import poster
+import render
+import settings
+import sweep
+
+FRACTALS = ('mandelbrot', 'julia')
+
+# the keys of a job, see the module docstring
+JOB_KEYS = ('fractal', 'size', 'start', 'end', 'max_iter', 'bailout',
+            'parameter', 'coloring', 'engine', 'mode', 'symmetry',
+            'precision', 'output', 'sweep', 'sweep_start', 'sweep_end',
+            'antialias', 'antialias_threshold', 'poster')
+
+
+def parse_complex(value):
+    """ returns 're,im', [re, im] or a number as a deep_zoom.Point """
+    if isinstance(value, str):
+        value = value.split(',')
+    if isinstance(value, (list, tuple)):
+        real, imag = value
+        try:
+            return deep_zoom.Point(str(real).strip(), str(imag).strip())
+        except decimal.InvalidOperation:
+            raise ValueError('not a complex number: {!r}'.format(value))
+    return deep_zoom.Point.from_complex(value)
+
+
+def parse_size(value):
+    """ returns 'WIDTHxHEIGHT' or [width, height] as a tuple of ints """
+    if isinstance(value, str):
+        value = value.lower().split('x')
+    width, height = (int(n) for n in value)
+    return width, height
+
+
+def run(job, colorings, defaults=None):
+    """ renders a job (a dict, see the module docstring) and saves the
+    image. colorings are the colorings by name (see
+    coloring.create_colorings), defaults is a settings.Snapshot with the
+    defaults of the missing keys (the settings defaults if None).
+    returns the written image (None for a poster) and the name of the
+    image file.
+    """
+    unknown = set(job) - set(JOB_KEYS)
+    if unknown:
+        raise KeyError(', '.join(sorted(unknown)))
+    fractal = job.get('fractal') or 'mandelbrot'
+    if fractal not in FRACTALS:
+        raise ValueError(fractal)
+    if defaults is None:
+        canvas = settings.defaults('canvas')
+        defaults = settings.defaults(fractal)
+    else:
+        canvas = defaults.canvas
+        defaults = getattr(defaults, fractal)
+    module = mandelbrot if fractal == 'mandelbrot' else julia
+    width, height = parse_size(job.get('size')
+                               or (canvas.size_x, canvas.size_y))
+    start = job.get('start')
+    end = job.get('end')
+    start = module.DEFAULT_COORDS[0] if start is None else start
+    end = module.DEFAULT_COORDS[1] if end is None else end
+    bailout = float(job.get('bailout') or defaults.bailout)
+    name = job.get('coloring') or defaults.coloring
+    if name not in colorings:
+        raise KeyError('unknown coloring: {!r}'.format(name))
+    start, end = parse_complex(start), parse_complex(end)
+    if fractal == 'mandelbrot':
+        parameter = None
+    else:
+        parameter = job.get('parameter')
+        if parameter is None:
+            parameter = (defaults.parameter_real, defaults.parameter_imag)
+        parameter = complex(parse_complex(parameter))
+    max_iter = job.get('max_iter')
+    if max_iter is None and defaults.auto_max_iter:
+        max_iter = 'auto'
+    if max_iter == 'auto':
+        if job.get('sweep'):
+            raise ValueError('a sweep needs a max_iter')
+        max_iter = render.estimate_itermax(width, height, start, end,
+                                           bailout, parameter)
+        print('max_iter {} (auto)'.format(max_iter))
+    max_iter = int(max_iter or defaults.max_iter)
+    precision = job.get('precision') or canvas.precision
+    options = dict(coloring=colorings[name](max_iter),
+                   bailout=bailout,
+                   itermax=max_iter,
+                   engine=job.get('engine'),
+                   mode=job.get('mode'),
+                   symmetry=job.get('symmetry'),
+                   precision=None if precision == 'auto' else precision)
+    if job.get('sweep'):
+        if fractal != 'julia':
+            raise ValueError('only julia sets can be swept')
+        return _sweep(job, width, height, start, end, options)
+    if job.get('poster'):
+        output = job.get('output') or fractal + '.png'
+        poster.poster(width, height, start, end, output,
+                      parameter=parameter, progress=_progress, **options)
+        print()
+        return None, output
+    if fractal == 'mandelbrot':
+        plane = mandelbrot.mandelbrot(width, height, start, end, **options)
+    else:
+        plane = julia.julia(width, height, start, end, parameter, **options)
+    samples = int(job.get('antialias') or 0)
+    if samples:
+        threshold = job.get('antialias_threshold')
+        antialias.antialias(plane, options['coloring'], samples,
+                            canvas.antialias_threshold if threshold is None
+                            else int(threshold),
+                            engine=options['engine'])
+        print(antialias.summary(plane))
+    output = job.get('output') or fractal + '.png'
+    image = plane.get_pil_image().convert('RGB')
+    image.save(output)
+    return image, output
+
+
+def _progress(fraction):
+    print('\r{:.0%}'.format(fraction), end='', flush=True)
+
+
+def _sweep(job, width, height, start, end, options):
+    columns, rows = parse_size(job['sweep'])
+    sweep_start, sweep_end = mandelbrot.DEFAULT_COORDS
+    parameters = sweep.grid(complex(parse_complex(job.get('sweep_start')
+                                                  or sweep_start)),
+                            complex(parse_complex(job.get('sweep_end')
+                                                  or sweep_end)),
+                            columns, rows)
+    statistics = collections.Counter()
+    planes = sweep.julia_sets(parameters, width, height,
+                              complex(start), complex(end),
+                              options['coloring'], options['bailout'],
+                              options['itermax'], statistics)
+    output = job.get('output') or 'julia.png'
+    if '{' in output:
+        for n, plane in enumerate(planes):
+            image = plane.get_pil_image().convert('RGB')
+            image.save(output.format(n))
+    else:
+        image = sweep.contact_sheet(planes, columns)
+        image.save(output)
+    print('swept {} julia sets at {:.3g} megapixels per second'.format(
+        len(parameters), sweep.throughput(statistics)))
+    return image, output
+
+
+def load_jobs(filename):
+    """ returns the jobs of a job file """
+    with open(filename) as f:
+        jobs = json.load(f)
+    if not isinstance(jobs, list):
+        raise ValueError('a job file has to contain a list of jobs')
+    return jobs
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m chaos render',
+        description='renders mandelbrot and julia sets without a window.')
+    parser.add_argument('fractal', nargs='?', choices=FRACTALS)
+    parser.add_argument('-o', '--output',
+                        help='the image file (default: FRACTAL.png)')
+    parser.add_argument('--size', help='WIDTHxHEIGHT in pixels')
+    parser.add_argument('--start', help='the upper left corner, re,im')
+    parser.add_argument('--end', help='the lower right corner, re,im')
+    parser.add_argument('--max-iter',
+                        help='a number or auto (see '
+                        'render.estimate_itermax)')
+    parser.add_argument('--bailout', type=float)
+    parser.add_argument('--parameter', help='the julia parameter, re,im')
+    parser.add_argument('--coloring',
+                        help='one of: ' + ', '.join(
+                            coloring.create_colorings(
+                                settings.defaults('coloring'))))
+    parser.add_argument('--engine', choices=render.ENGINES)
+    parser.add_argument('--mode', choices=render.MODES)
+    parser.add_argument('--precision',
+                        choices=('auto',) + render.PRECISIONS)
+    parser.add_argument('--no-symmetry', dest='symmetry',
+                        action='store_false', default=None,
+                        help='render symmetric views completely')
+    parser.add_argument('--sweep', metavar='COLUMNSxROWS',
+                        help='renders the julia sets of a grid of parameters')
+    parser.add_argument('--sweep-start',
+                        help='the upper left corner of the grid, re,im')
+    parser.add_argument('--sweep-end',
+                        help='the lower right corner of the grid, re,im')
+    parser.add_argument('--antialias', type=int, metavar='SAMPLES',
+                        help='extra samples per edge pixel, off by default')
+    parser.add_argument('--antialias-threshold', type=int,
+                        help='the color difference of an edge')
+    parser.add_argument('--poster', action='store_true', default=None,
+                        help='renders tile by tile through a file on disk')
+    parser.add_argument('--cache', action='store_true',
+                        help='keeps the rendered views in the cache of the '
+                        'user interface and reuses them (see cache.py)')
+    parser.add_argument('--settings', metavar='FILE',
+                        help='takes the defaults from the settings file FILE')
+    parser.add_argument('--jobs', metavar='FILE',
+                        help='renders all jobs of the json file FILE')
+    return parser
+
+
+def main(argv=None):
+    """ the command line interface, see the module docstring. returns the
+    exit code.
+    """
+    args = create_parser().parse_args(argv)
+    if args.jobs:
+        jobs = load_jobs(args.jobs)
+    else:
+        jobs = [{key: getattr(args, key) for key in JOB_KEYS}]
+    settings.initialize()
+    if args.settings:
+        settings.load(args.settings)
+    defaults = settings.snapshot()
+    colorings = coloring.create_colorings(defaults.coloring)
+    if args.cache:
+        cache.enable(budget=defaults.canvas.cache_size * 2 ** 20)
+    failed = 0
+    try:
+        for job in jobs:
+            t0 = time.perf_counter()
+            try:
+                image, output = run(job, colorings, defaults)
+            except (KeyError, ValueError, TypeError, OSError) as e:
+                print('job {} failed: {}'.format(job, e), file=sys.stderr)
+                failed += 1
+                continue
+            if image is None:
+                print('wrote {} in {:.3g} seconds'.format(
+                    output, time.perf_counter() - t0))
+            else:
+                print('wrote {} ({}x{}) in {:.3g} seconds'.format(
+                    output, *image.size, time.perf_counter() - t0))
+        if cache.CACHE:
+            print('cache: ' + cache.CACHE.summary())
+    finally:
+        parallel.shutdown()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    # 'python batch.py render ...' works like 'python -m chaos render ...'
+    argv = sys.argv[1:]
+    if argv[:1] == ['render']:
+        argv = argv[1:]
+    sys.exit(main(argv))
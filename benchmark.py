@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+"""
+Filename: benchmark.py
+Author: Lukas Singer <lukas42singer (at) gmail (dot) com>
+Created: 2026/10/18
+Copyright: 2026, Lukas Singer
+License: WTFPL (see COPYING or <http://www.wtfpl.net/>)
+Description: Benchmarks the renderers and the colorings.
+
+  python benchmark.py -o before.json
+  ... change something ...
+  python benchmark.py -o after.json --compare before.json
+
+  renders the SCENES in all SIZES and with all ITERMAXES through
+  mandelbrot.mandelbrot() and julia.julia() and colors every rendered
+  plane again with every coloring of coloring.py (the distance colorings
+  color a plane rendered with distances). reports the pixels and
+  iterations (the steps actually iterated, see ComplexPlane.statistics,
+  not the iteration counts of the pixels which were found inside by a
+  shortcut or mirrored) per second and the peak memory (of an extra run
+  with tracemalloc, it slows the run down). the times are the best of
+  --repeat runs.
+  with --compare the results are compared to an older run, the ones which
+  got slower by more than --threshold are flagged and the exit code is 1.
+"""
+
+import argparse
+import collections
+import contextlib
+import io
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import coloring
+import julia
+import mandelbrot
+import parallel
+import render
+import settings
+
+# name: (fractal, start, end, julia parameter)
+SCENES = collections.OrderedDict([
+    ('mandelbrot', ('mandelbrot', -2.2+1.4j, 1-1.4j, None)),
+    ('interior', ('mandelbrot', -0.6+0.4j, 0.2-0.4j, None)),
+    ('seahorse', ('mandelbrot', -0.77+0.14j, -0.73+0.1j, None)),
+    ('julia dendrite', ('julia', -2+2j, 2-2j, 1j)),
+    ('julia rabbit', ('julia', -2+2j, 2-2j, -0.12+0.75j)),
+    ('julia spiral', ('julia', -2+2j, 2-2j, -0.8+0.156j)),
+    ('julia dust', ('julia', -2+2j, 2-2j, 0.285+0.5j)),
+    ])
+
+SIZES = ((160, 120), (320, 240))
+ITERMAXES = (256, 1024)
+REPEAT = 3
+
+# a result is a regression if it takes this much longer than before
+THRESHOLD = 0.1
+
+
+def run(scenes=None, sizes=SIZES, itermaxes=ITERMAXES, engines=(None,),
+        modes=(None,), repeat=REPEAT, report=None):
+    """ runs the benchmark and returns the results, a list of dicts. the
+    engines and modes are the ones of render.render (None is the default).
+    report is called with every result.
+    """
+    colorings = coloring.create_colorings(settings.defaults('coloring'))
+    results = []
+
+    def add(**result):
+        results.append(result)
+        if report:
+            report(result)
+
+    for scene in scenes or SCENES:
+        fractal, start, end, parameter = SCENES[scene]
+        module = mandelbrot if fractal == 'mandelbrot' else julia
+        function = getattr(module, fractal)
+        for (width, height), itermax, engine, mode in itertools.product(
+                sizes, itermaxes, engines, modes):
+            if fractal == 'mandelbrot':
+                args = (width, height, start, end)
+            else:
+                args = (width, height, start, end, parameter)
+            kwargs = dict(itermax=itermax, engine=engine, mode=mode)
+            key = dict(scene=scene, width=width, height=height,
+                       itermax=itermax,
+                       engine=engine or render.DEFAULT_ENGINE,
+                       mode=mode or render.DEFAULT_MODE)
+            seconds, plane = _best(repeat, function, *args, **kwargs)
+            iterations = plane.statistics['iterations']
+            add(coloring=None, seconds=seconds,
+                pixels_per_second=width * height / seconds,
+                iterations_per_second=iterations / seconds,
+                peak_memory=_peak_memory(function, *args, **kwargs),
+                **key)
+            # the distance colorings need a plane with distances
+            distance_plane = None
+            for name, create in colorings.items():
+                f = create(itermax)
+                target = plane
+                if hasattr(f, 'distance'):
+                    if distance_plane is None:
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            distance_plane = function(*args, distance=True,
+                                                      **kwargs)
+                    target = distance_plane
+                seconds, _ = _best(repeat, module.recolor, target, f)
+                add(coloring=name, seconds=seconds,
+                    pixels_per_second=width * height / seconds,
+                    iterations_per_second=None,
+                    peak_memory=_peak_memory(module.recolor, target, f),
+                    **key)
+    return results
+
+
+def _best(repeat, function, *args, **kwargs):
+    """ returns the shortest time of repeat calls and the last result """
+    best = None
+    for n in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            result = function(*args, **kwargs)
+            seconds = time.perf_counter() - t0
+        if best is None or seconds < best:
+            best = seconds
+    return best, result
+
+
+def _peak_memory(function, *args, **kwargs):
+    """ returns the peak of the memory allocated by a call in bytes """
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            function(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _key(result):
+    return (result['scene'], result['width'], result['height'],
+            result['itermax'], result['engine'], result['mode'],
+            result['coloring'])
+
+
+def compare(results, before, threshold=THRESHOLD):
+    """ returns the results which are slower than the same ones of before
+    by more than threshold as (result, old result) pairs.
+    """
+    old = {_key(result): result for result in before}
+    regressions = []
+    for result in results:
+        previous = old.get(_key(result))
+        if (previous
+            and result['seconds'] > previous['seconds'] * (1 + threshold)):
+            regressions.append((result, previous))
+    return regressions
+
+
+def save(filename, results):
+    with open(filename, 'w') as f:
+        json.dump({'python': platform.python_version(),
+                   'numpy': np.__version__,
+                   'machine': platform.machine(),
+                   'results': results}, f, indent=2)
+
+
+def load(filename):
+    with open(filename) as f:
+        return json.load(f)['results']
+
+
+def _format(result):
+    return ('{scene:16} {width:5}x{height:<5} {itermax:6} {engine:9} '
+            '{mode:12} {stage:15} {seconds:9.4f} s {mpps:8.3f} MP/s '
+            '{ips} {memory:8.1f} MB').format(
+                stage=result['coloring'] or 'render', mpps=(
+                    result['pixels_per_second'] / 1e6),
+                ips=('{:9.1f} Mit/s'.format(
+                    result['iterations_per_second'] / 1e6)
+                     if result['iterations_per_second'] is not None
+                     else ' ' * 15),
+                memory=result['peak_memory'] / 2 ** 20, **result)
+
+
+def _sizes(text):
+    return tuple(tuple(int(n) for n in size.lower().split('x'))
+                 for size in text.split(','))
+
+
+def _ints(text):
+    return tuple(int(n) for n in text.split(','))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='benchmarks the renderers and the colorings.')
+    parser.add_argument('-o', '--output', help='saves the results as json')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='flags the regressions against an older run')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help='slower than this fraction is a regression')
+    parser.add_argument('--scenes', help='comma separated, one of: '
+                        + ', '.join(SCENES))
+    parser.add_argument('--sizes', type=_sizes, default=SIZES,
+                        help='comma separated WIDTHxHEIGHT')
+    parser.add_argument('--max-iter', type=_ints, default=ITERMAXES,
+                        help='comma separated')
+    parser.add_argument('--engines', default='',
+                        help='comma separated, of: ' + ', '.join(
+                            render.ENGINES))
+    parser.add_argument('--modes', default='',
+                        help='comma separated, of: ' + ', '.join(
+                            render.MODES))
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    args = parser.parse_args(argv)
+    scenes = args.scenes.split(',') if args.scenes else None
+    try:
+        results = run(scenes, args.sizes, args.max_iter,
+                      args.engines.split(',') if args.engines else (None,),
+                      args.modes.split(',') if args.modes else (None,),
+                      args.repeat, lambda result: print(_format(result)))
+    finally:
+        parallel.shutdown()
+    if args.output:
+        save(args.output, results)
+    if args.compare:
+        regressions = compare(results, load(args.compare), args.threshold)
+        for result, previous in regressions:
+            print('REGRESSION: {} (was {:.4f} s)'.format(
+                _format(result), previous['seconds']))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
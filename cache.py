@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+"""
+Filename: cache.py
+Author: Lukas Singer <lukas42singer (at) gmail (dot) com>
+Created: 2026/10/18
+Copyright: 2026, Lukas Singer
+License: WTFPL (see COPYING or <http://www.wtfpl.net/>)
+Description: A cache of rendered iteration fields on disk.
+
+  render.render() looks up every plane in the cache (if one is enabled)
+  before iterating it. the cache stores the iteration field (the counts,
+  the absolute values of the final z and the distances, and the final z of
+  the pixels which did not escape, see render.resume()), not the colors,
+  so a cached view can be shown with any coloring.
+
+    cache.enable(budget=64 * 2 ** 20)
+    mandelbrot.mandelbrot(800, 600, start, end)  # iterates
+    mandelbrot.mandelbrot(800, 600, start, end)  # loads the field
+    print(cache.CACHE.summary())
+
+  an entry is a compressed numpy file named by the hash of everything the
+  field depends on (see key()). the entries which were not used for the
+  longest time are removed when the cache grows bigger than its budget.
+"""
+
+import collections
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zipfile
+
+import numpy as np
+
+import deep_zoom
+
+# the default directory of the cache
+DIRECTORY = os.path.join(os.environ.get('XDG_CACHE_HOME')
+                         or os.path.join(os.path.expanduser('~'), '.cache'),
+                         'chaos')
+
+# the default size of the cache in bytes
+BUDGET = 256 * 2 ** 20
+
+# part of the key, change it when the entries can't be used anymore
+FORMAT = 3
+
+# the cache used by render.render(), None turns it off (see enable())
+CACHE = None
+
+
+class RenderCache:
+    """ the entries of a cache directory. statistics counts the 'hits',
+    'misses', 'stores' and 'evictions'.
+    """
+
+    def __init__(self, directory=DIRECTORY, budget=BUDGET):
+        super().__init__()
+        self.directory = directory
+        self.budget = budget
+        self.statistics = collections.Counter()
+        # renders run in background threads
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _filename(self, key):
+        return os.path.join(self.directory, key + '.npz')
+
+    def get(self, key):
+        """ returns the arrays stored under key as a dict or None """
+        filename = self._filename(key)
+        with self._lock:
+            try:
+                with np.load(filename) as data:
+                    arrays = {name: data[name] for name in data.files}
+            except (OSError, ValueError, zipfile.BadZipFile):
+                self.statistics['misses'] += 1
+                return None
+            # the modification time is the time of the last use
+            os.utime(filename)
+            self.statistics['hits'] += 1
+        return arrays
+
+    def put(self, key, **arrays):
+        """ stores the arrays under key and evicts old entries if the
+        cache got too big
+        """
+        fd, temporary = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(f, **arrays)
+            # readers never see a half written entry
+            os.replace(temporary, self._filename(key))
+        except BaseException:
+            os.remove(temporary)
+            raise
+        with self._lock:
+            self.statistics['stores'] += 1
+            self._evict(self.budget)
+
+    def entries(self):
+        """ returns (last use, bytes, filename) of all entries, the least
+        recently used first
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.npz'):
+                continue
+            filename = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, filename))
+        return sorted(entries)
+
+    def size(self):
+        """ returns the size of all entries in bytes """
+        return sum(size for _, size, _ in self.entries())
+
+    def _evict(self, budget):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, filename in entries:
+            if total <= budget:
+                break
+            try:
+                os.remove(filename)
+            except OSError:
+                continue
+            total -= size
+            self.statistics['evictions'] += 1
+
+    def clear(self):
+        """ removes all entries """
+        with self._lock:
+            self._evict(0)
+
+    def summary(self):
+        """ returns a short text of the statistics and the size """
+        hits, misses = self.statistics['hits'], self.statistics['misses']
+        entries = self.entries()
+        return ('{} hits, {} misses ({:.0%} hits), {} entries, '
+                '{:.1f} of {:.0f} MB'.format(
+                    hits, misses, hits / (hits + misses or 1), len(entries),
+                    sum(size for _, size, _ in entries) / 2 ** 20,
+                    self.budget / 2 ** 20))
+
+
+def enable(directory=DIRECTORY, budget=BUDGET):
+    """ enables the cache of render.render() and returns it. a budget of 0
+    disables it.
+    """
+    global CACHE
+    if not budget:
+        CACHE = None
+    elif CACHE is not None and CACHE.directory == directory:
+        CACHE.budget = budget
+    else:
+        CACHE = RenderCache(directory, budget)
+    return CACHE
+
+
+def key(plane, bailout, itermax, parameter, distance, approximate,
+        precision):
+    """ returns the key of the iteration field of the plane. approximate
+    is true for the fields of the 'subdivision' mode, which may differ
+    from the iterated ones. precision is the one the field is iterated
+    with (see render.PRECISIONS).
+    """
+    start, end, width, height = plane.view
+    deep = deep_zoom.is_deep(plane)
+
+    def number(n):
+        # the same number has got the same text, e.g. 1 and 1.0
+        with deep_zoom.exact():
+            return str(n.normalize())
+
+    def point(p):
+        if not deep:
+            # the view is iterated with complex numbers
+            p = complex(p)
+            return [repr(p.real), repr(p.imag)]
+        p = deep_zoom.Point.from_complex(p)
+        return [number(p.real), number(p.imag)]
+
+    text = json.dumps([FORMAT,
+                       'mandelbrot' if parameter is None else 'julia',
+                       point(start), point(end), width, height,
+                       list(plane.origin), list(plane.size),
+                       repr(float(bailout)), itermax,
+                       None if parameter is None
+                       else [repr(parameter.real), repr(parameter.imag)],
+                       bool(distance), bool(approximate), precision])
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def load(plane, bailout, itermax, parameter, distance, approximate,
+         precision):
+    """ fills the iteration field of the plane from the cache. returns
+    False if the cache is off or hasn't got the field.
+    """
+    cache = CACHE
+    if cache is None:
+        return False
+    with plane.metrics.stage('cache'):
+        arrays = cache.get(key(plane, bailout, itermax, parameter, distance,
+                               approximate, precision))
+        if arrays is None:
+            return False
+        plane.init_field(itermax, parameter, bailout, distance, precision)
+        plane.iterations[...] = arrays['iterations']
+        plane.values[...] = arrays['values']
+        plane.z[plane.iterations >= itermax] = arrays['interior']
+        if distance:
+            plane.distances[...] = arrays['distances']
+    plane.statistics['cached'] += plane.iterations.size
+    return True
+
+
+def store(plane, approximate):
+    """ stores the iteration field of the rendered plane in the cache """
+    cache = CACHE
+    if cache is None:
+        return
+    arrays = dict(iterations=plane.iterations, values=plane.values,
+                  interior=plane.z[plane.iterations >= plane.itermax])
+    if plane.distances is not None:
+        arrays['distances'] = plane.distances
+    with plane.metrics.stage('cache'):
+        cache.put(key(plane, plane.bailout, plane.itermax, plane.parameter,
+                      plane.distances is not None, approximate,
+                      plane.precision), **arrays)
@@ -8,13 +8,28 @@ License: WTFPL (see COPYING or <http://www.wtfpl.net/>)
 Description: This is the user interface of a fractal generator.
 """
 
+import sys
+
+if __name__ == '__main__' and sys.argv[1:2] == ['render']:
+    # 'python -m chaos render ...' renders without the window and without
+    # importing tk. batch runs as the main module, so the worker processes
+    # of the parallel engine import batch and not this module.
+    import runpy
+    runpy.run_module('batch', run_name='__main__', alter_sys=True)
+    sys.exit()
+
 import tkinter as tk
 import tkinter.filedialog
 from tkinter import N, E, S, W, TOP, BOTTOM, LEFT, RIGHT, HORIZONTAL, VERTICAL
 
 import tkinter_ex as tke
+import antialias
+import cache
+import deep_zoom
+import jobs
 import mandelbrot
 import julia
+import render
 import settings
 import coloring
 import coloring_settings
@@ -35,8 +50,36 @@ have fun :-)
 """.format(title=TITLE, version=VERSION, author=AUTHOR, license=LICENSE)
 
 WINDOW_SIZE_MIN = (320, 240)
-MANDELBROT_DEFAULT_COORDS = (-2.2+1.4j, 1-1.4j)
-JULIA_DEFAULT_COORDS = (-2+2j, 2-2j)
+MANDELBROT_DEFAULT_COORDS = mandelbrot.DEFAULT_COORDS
+JULIA_DEFAULT_COORDS = julia.DEFAULT_COORDS
+# milliseconds between two looks at a running render
+POLL_INTERVAL = 50
+
+
+def auto_render(function, width, height, start, end, parameter,
+                create_coloring, bailout, **kwargs):
+    """ renders the view with function (mandelbrot.mandelbrot or
+    julia.julia, parameter is None for the mandelbrot set) and the max_iter
+    estimated for it (see render.estimate_itermax()). create_coloring takes
+    the max_iter and returns the coloring. this runs in the render job, the
+    probe of a deep zoom takes a while.
+    """
+    max_iter = render.estimate_itermax(width, height, start, end, bailout,
+                                       parameter)
+    if parameter is None:
+        args = (width, height, start, end)
+    else:
+        args = (width, height, start, end, parameter)
+    return function(*args, create_coloring(max_iter), bailout, max_iter,
+                    **kwargs)
+
+
+def precision(canvas):
+    """ returns the precision of the canvas settings for render.render(),
+    None for 'auto'
+    """
+    return None if canvas.precision == 'auto' else canvas.precision
+
 
 ###############################################################################
 ###   THE CHAOS BEGINS   ######################################################
@@ -47,15 +90,26 @@ class Chaos:
         super().__init__()
 
         self.last_render_function = None
+        self.last_recolor_function = None
         self.img_id = None
         self.mouse_down_position = None
         self.complex_plane = None
+        # the plane which was anti-aliased by export_image()
+        self.antialiased_plane = None
+        self.job = None
+        # the last render estimated its max_iter, see auto_render()
+        self.auto_max_iter = False
 
         self.parent = parent
 #        self.root.title('{} - {}'.format(TITLE, VERSION))
 
         settings.initialize()
         coloring.initialize()
+        settings.mandelbrot.trace(self.recolor, 'coloring')
+        settings.julia.trace(self.recolor, 'coloring')
+        settings.coloring.trace(self.recolor)
+        settings.canvas.trace(self.show_metrics, 'metrics')
+        self.enable_cache()
 
         self.canvas = tk.Canvas(self.parent)
         self.canvas.bind('<Motion>', self.mouse_move)
@@ -73,10 +127,22 @@ class Chaos:
         self.canvas.config(xscrollcommand=self.scroll_x.set)
         self.canvas.config(yscrollcommand=self.scroll_y.set)
 
+        self.statusbar = tk.Frame(self.parent)
+        self.statusbar.grid(row=2, column=0, columnspan=2, sticky=E+W)
+        self.status_var = tk.StringVar()
+        self.status_lbl = tk.Label(self.statusbar,
+                                   textvariable=self.status_var)
+        self.status_lbl.pack(side=LEFT)
         self.coords_var = tk.StringVar()
         self.coords_var.set('###')
-        self.coords_lbl = tk.Label(self.parent, textvariable=self.coords_var)
-        self.coords_lbl.grid(row=2, column=0, columnspan=2, sticky=S+E)
+        self.coords_lbl = tk.Label(self.statusbar,
+                                   textvariable=self.coords_var)
+        self.coords_lbl.pack(side=RIGHT)
+        # the timings of the last render, see show_metrics()
+        self.metrics_var = tk.StringVar()
+        self.metrics_lbl = tk.Label(self.statusbar,
+                                    textvariable=self.metrics_var)
+        self.metrics_lbl.pack(side=RIGHT)
 
         tk.Grid.rowconfigure(self.parent, 0, weight=1)
         tk.Grid.columnconfigure(self.parent, 0, weight=1)
@@ -87,6 +153,10 @@ class Chaos:
         self.filemenu = tk.Menu(self.menubar)
         self.filemenu.add_command(label='Save', command=lambda:print('sorry'))
         self.filemenu.add_command(label='Eport', command=self.export_image)
+        self.filemenu.add_command(label='Load Settings',
+                                  command=self.load_settings)
+        self.filemenu.add_command(label='Save Settings',
+                                  command=self.save_settings)
 #        self.filemenu.add_separator()
         self.filemenu.add_command(label='Close', command=self.parent.quit)
         self.menubar.add_cascade(label='File', menu=self.filemenu)
@@ -96,6 +166,8 @@ class Chaos:
                                     command=self.render_mandelbrot)
         self.rendermenu.add_command(label='Julia',
                                     command=self.render_julia)
+        self.rendermenu.add_command(label='Recolor',
+                                    command=self.recolor)
         self.menubar.add_cascade(label='Render', menu=self.rendermenu)
 
         self.settingsmenu = tke.Menu(self.menubar)
@@ -122,10 +194,6 @@ class Chaos:
         # TODO: implement the cursor manager found here:
         #       http://effbot.org/zone/tkinter-busy.htm
         self.parent.config(cursor='spraycan')
-        if self.img_id:
-            self.canvas.delete(self.img_id)
-            self.img_id = None
-        self.parent.update()
         if not complex_coords:
             complex_coords = default_complex_coords
         if settings.canvas.lock_ratio:
@@ -133,81 +201,309 @@ class Chaos:
                 complex_coords)
         return complex_coords
 
-    def after_render(self, last_render_function):
-        self.img_id = self.canvas.create_image(
-            0, 0,
-            anchor=N+W,
-            image=self.complex_plane.get_tk_image())
+    def after_render(self):
+        self.show_image()
         self.canvas.config(
-            scrollregion=(0, 0,
-                          settings.canvas.size_x,
-                          settings.canvas.size_y))
+            scrollregion=(0, 0) + self.complex_plane.size)
         self.parent.config(cursor='')
+        self.show_metrics()
+        if self.auto_max_iter:
+            self.status_var.set('max. iterations: {} (auto)'.format(
+                self.complex_plane.itermax))
+
+    def show_metrics(self, *dummy):
+        """ shows the timings of the stages of the last render in the
+        status bar, if enabled in the canvas settings
+        """
+        if settings.canvas.metrics and self.complex_plane:
+            self.metrics_var.set(self.complex_plane.metrics.summary())
+        else:
+            self.metrics_var.set('')
+
+    def enable_cache(self, *dummy):
+        """ sizes the cache of rendered views (see cache.py) as set in the
+        canvas settings. it is called when a size was entered (see
+        bind_entered()), a smaller one evicts views.
+        """
+        cache.enable(budget=settings.canvas.cache_size * 2 ** 20)
+
+    def start_render(self, function, args, mode,
+                     last_render_function, last_recolor_function, **kwargs):
+        """ runs function(*args, **kwargs) in the background. a running
+        render is cancelled, its result would be outdated anyway.
+        """
+        if self.job:
+            self.job.cancel()
+        self.job = jobs.RenderJob(function, *args, mode=mode, **kwargs)
         self.last_render_function = last_render_function
+        self.last_recolor_function = last_recolor_function
+        self.poll_render(self.job)
+
+    def poll_render(self, job, shown=0.0):
+        """ shows the progress and the partial image of the render job
+        until it is done.
+        """
+        if job is not self.job:
+            # the job was cancelled, a newer one is running.
+            return
+        if job.done:
+            self.job = None
+            self.status_var.set('')
+            self.parent.config(cursor='')
+            if job.error:
+                raise job.error
+            self.complex_plane = job.result
+            self.after_render()
+            return
+        if job.plane is not None and job.progress > shown:
+            shown = job.progress
+            self.complex_plane = job.plane
+            self.show_image()
+            self.status_var.set('rendering {:.0%}'.format(shown))
+        self.parent.after(POLL_INTERVAL, self.poll_render, job, shown)
+
+    def show_image(self):
+        image = self.complex_plane.get_tk_image()
+        with self.complex_plane.metrics.stage('display'):
+            if self.img_id:
+                self.canvas.delete(self.img_id)
+            self.img_id = self.canvas.create_image(
+                0, 0,
+                anchor=N+W,
+                image=image)
+
+    def recolor(self, *dummy):
+        """ colors the last rendered image again with the current coloring
+        settings. this does not iterate again, so it is fast.
+        """
+        if (self.complex_plane
+            and self.last_recolor_function
+            and not self.job):
+            if (hasattr(self.current_coloring(), 'distance')
+                and self.complex_plane.distances is None):
+                # the distances are estimated while iterating, so the
+                # view has to be rendered again.
+                self.last_render_function(self.complex_plane.view[:2])
+                return
+            self.last_recolor_function()
+            self.antialiased_plane = None
+            self.show_image()
+            self.show_metrics()
+
+    def bind_entered(self, entry, function):
+        """ calls function() when a value was entered into entry: on
+        return, when the entry loses the focus or when its window is
+        closed. not on every key, typing 3000 would pass 3, 30 and 300
+        first.
+        """
+        def entered(*dummy):
+            function()
+        for sequence in ('<Return>', '<FocusOut>', '<Destroy>'):
+            entry.bind(sequence, entered)
+
+    def bind_continue(self, entry, module, group):
+        """ continues the shown plane (see continue_render()) when a
+        max_iter was entered into entry (see bind_entered()).
+        """
+        self.bind_entered(entry,
+                          lambda: self.continue_render(module, group))
+
+    def continue_render(self, module, group):
+        """ iterates the shown plane on when max_iter of its fractal
+        (module is mandelbrot or julia, group are its settings) was raised,
+        instead of rendering it again (see render.resume()).
+        """
+        plane = self.complex_plane
+        if (not plane or self.job or plane.itermax is None
+            or (plane.parameter is None) != (module is mandelbrot)):
+            return
+        s = group.snapshot()
+        if s.max_iter <= plane.itermax:
+            return
+        self.parent.config(cursor='spraycan')
+        self.start_render(
+            module.resume,
+            (plane, s.max_iter, coloring.colorings[s.coloring](s.max_iter)),
+            settings.canvas.mode,
+            self.last_render_function,
+            self.last_recolor_function)
 
     def render_mandelbrot(self, complex_coords=None):
         complex_coords = self.before_render(complex_coords,
                                             MANDELBROT_DEFAULT_COORDS)
-        max_iter = settings.mandelbrot.max_iter
-        self.complex_plane = mandelbrot.mandelbrot(
-            settings.canvas.size_x,
-            settings.canvas.size_y,
-            *complex_coords,
-            coloring.colorings[settings.mandelbrot.coloring](max_iter),
-            settings.mandelbrot.bailout,
-            max_iter)
-        self.after_render(self.render_mandelbrot)
+        # the render runs in the background, so it gets a copy of the
+        # settings which can't change while it runs.
+        s = settings.snapshot()
+        max_iter = s.mandelbrot.max_iter
+        self.auto_max_iter = s.mandelbrot.auto_max_iter
+        if self.auto_max_iter:
+            function = auto_render
+            args = (mandelbrot.mandelbrot,
+                    s.canvas.size_x,
+                    s.canvas.size_y,
+                    *complex_coords,
+                    None,
+                    coloring.colorings[s.mandelbrot.coloring],
+                    s.mandelbrot.bailout)
+        else:
+            function = mandelbrot.mandelbrot
+            args = (s.canvas.size_x,
+                    s.canvas.size_y,
+                    *complex_coords,
+                    coloring.colorings[s.mandelbrot.coloring](max_iter),
+                    s.mandelbrot.bailout,
+                    max_iter)
+        self.start_render(
+            function,
+            args,
+            s.canvas.mode,
+            self.render_mandelbrot,
+            self.recolor_mandelbrot,
+            precision=precision(s.canvas))
+
+    def recolor_mandelbrot(self):
+        mandelbrot.recolor(
+            self.complex_plane,
+            coloring.colorings[settings.mandelbrot.coloring](
+                self.complex_plane.itermax))
 
     def render_julia(self, complex_coords=None):
         complex_coords = self.before_render(complex_coords,
                                             JULIA_DEFAULT_COORDS)
-        julia_parameter = settings.julia.parameter_real + (
-            settings.julia.parameter_imag * 1j)
-        max_iter = settings.julia.max_iter
-        self.complex_plane = julia.julia(
-            settings.canvas.size_x,
-            settings.canvas.size_y,
-            *complex_coords,
-            julia_parameter,
-            coloring.colorings[settings.julia.coloring](max_iter),
-            settings.julia.bailout,
-            max_iter)
+        s = settings.snapshot()
+        julia_parameter = s.julia.parameter_real + (
+            s.julia.parameter_imag * 1j)
+        max_iter = s.julia.max_iter
+        self.auto_max_iter = s.julia.auto_max_iter
+        if self.auto_max_iter:
+            function = auto_render
+            args = (julia.julia,
+                    s.canvas.size_x,
+                    s.canvas.size_y,
+                    *complex_coords,
+                    julia_parameter,
+                    coloring.colorings[s.julia.coloring],
+                    s.julia.bailout)
+        else:
+            function = julia.julia
+            args = (s.canvas.size_x,
+                    s.canvas.size_y,
+                    *complex_coords,
+                    julia_parameter,
+                    coloring.colorings[s.julia.coloring](max_iter),
+                    s.julia.bailout,
+                    max_iter)
 #            -0.12+0.75j)
-        self.after_render(self.render_julia)
+        self.start_render(
+            function,
+            args,
+            s.canvas.mode,
+            self.render_julia,
+            self.recolor_julia,
+            precision=precision(s.canvas))
+
+    def recolor_julia(self):
+        julia.recolor(
+            self.complex_plane,
+            coloring.colorings[settings.julia.coloring](
+                self.complex_plane.itermax))
 
     def expand_complex_coords_to_canvas_size(self, complex_coords):
         # this function does what it should, but it looks ugly.
         # TODO: make it better.
-        z1, z2 = complex_coords
+        # the coords are computed with decimals, so deep zooms keep
+        # their precision (see deep_zoom.py).
+        z1, z2 = (deep_zoom.Point.from_complex(z) for z in complex_coords)
         canvas_w, canvas_h = settings.canvas.size_x, settings.canvas.size_y
-        complex_w, complex_h = abs(z2.real - z1.real), abs(z2.imag - z1.imag)
-        pixel_delta_x = complex_w / canvas_w
-        pixel_delta_y = complex_h / canvas_h
-        if pixel_delta_x < pixel_delta_y:
-            expand = canvas_w * pixel_delta_y
-            center = z1.real + (z2.real - z1.real) / 2
-            z1 = (center - expand / 2) + (z1.imag * 1j)
-            z2 = (center + expand / 2) + (z2.imag * 1j)
-        if pixel_delta_x > pixel_delta_y:
-            expand = canvas_h * pixel_delta_x
-            center = z1.imag + (z2.imag - z1.imag) / 2
-            z1 = z1.real + ((center - expand / 2) * 1j)
-            z2 = z2.real + ((center + expand / 2) * 1j)
+        with deep_zoom.context(z1, z2, max(canvas_w, canvas_h)):
+            complex_w = abs(z2.real - z1.real)
+            complex_h = abs(z2.imag - z1.imag)
+            pixel_delta_x = complex_w / canvas_w
+            pixel_delta_y = complex_h / canvas_h
+            if pixel_delta_x < pixel_delta_y:
+                expand = canvas_w * pixel_delta_y
+                center = z1.real + (z2.real - z1.real) / 2
+                z1 = deep_zoom.Point(center - expand / 2, z1.imag)
+                z2 = deep_zoom.Point(center + expand / 2, z2.imag)
+            if pixel_delta_x > pixel_delta_y:
+                expand = canvas_h * pixel_delta_x
+                center = z1.imag + (z2.imag - z1.imag) / 2
+                z1 = deep_zoom.Point(z1.real, center - expand / 2)
+                z2 = deep_zoom.Point(z2.real, center + expand / 2)
         return z1, z2
 
     def export_image(self):
-        if self.complex_plane:
+        if self.complex_plane and not self.job:
             filename = tk.filedialog.asksaveasfilename(defaultextension='.png')
             if filename:
-                img = self.complex_plane.get_pil_image()
-                img.save(filename)
+                self.antialias(filename)
+
+    def antialias(self, filename):
+        """ anti-aliases the edges of the shown plane (see antialias.py)
+        with the samples and the threshold of the canvas settings, once, in
+        the background like a render, then saves it as filename.
+        """
+        samples = settings.canvas.antialias_samples
+        if not samples or self.antialiased_plane is self.complex_plane:
+            self.save_image(filename)
+            return
+        self.parent.config(cursor='watch')
+        self.job = jobs.RenderJob(antialias.antialias, self.complex_plane,
+                                  self.current_coloring(), samples,
+                                  settings.canvas.antialias_threshold)
+        self.poll_antialias(self.job, filename)
+
+    def poll_antialias(self, job, filename):
+        """ shows the progress of the anti-aliasing job until it is done,
+        a render started meanwhile cancels it and nothing is saved.
+        """
+        if job is not self.job:
+            return
+        if not job.done:
+            self.status_var.set('anti-aliasing {:.0%}'.format(job.progress))
+            self.parent.after(POLL_INTERVAL, self.poll_antialias, job,
+                              filename)
+            return
+        self.job = None
+        self.parent.config(cursor='')
+        if job.error:
+            self.status_var.set('')
+            raise job.error
+        self.antialiased_plane = self.complex_plane
+        self.show_image()
+        self.status_var.set(antialias.summary(self.complex_plane))
+        self.save_image(filename)
+
+    def save_image(self, filename):
+        img = self.complex_plane.get_pil_image()
+        img.convert('RGB').save(filename)
+
+    def current_coloring(self):
+        """ returns the coloring function of the current settings for the
+        shown plane
+        """
+        group = (settings.mandelbrot if self.complex_plane.parameter is None
+                 else settings.julia)
+        return coloring.colorings[group.coloring](self.complex_plane.itermax)
+
+
+    def load_settings(self):
+        filename = tk.filedialog.askopenfilename(defaultextension='.json')
+        if filename:
+            settings.load(filename)
+            self.enable_cache()
+
+    def save_settings(self):
+        filename = tk.filedialog.asksaveasfilename(defaultextension='.json')
+        if filename:
+            settings.save(filename)
 
 
     def mouse_down(self, event):
         if self.complex_plane:
             self.parent.config(cursor='cross')
             p = (event.x, event.y)
-            self.mouse_down_position = self.complex_plane.p2c(p)
+            self.mouse_down_position = deep_zoom.p2c(self.complex_plane, p)
 
     def mouse_up(self, event):
         if (self.mouse_down_position
@@ -220,7 +516,7 @@ class Chaos:
                 p = p[0] + 1, p[1] + 1
             self.canvas.delete(self.img_id)
             complex_coords = (self.mouse_down_position,
-                              self.complex_plane.p2c(p))
+                              deep_zoom.p2c(self.complex_plane, p))
             self.last_render_function(complex_coords)
             self.mouse_down_position = None
 
@@ -251,6 +547,41 @@ class Chaos:
         tk.Checkbutton(window, text='Enabled',
                        variable=settings.canvas.get_lock_ratio_var()).grid(
                            row=1, column=1, sticky=N+S+W)
+        tk.Label(window, text='Render mode:').grid(row=2, column=0, sticky=W)
+        tk.OptionMenu(window, settings.canvas.get_mode_var(),
+                      *render.MODES).grid(
+                          row=2, column=1, columnspan=2, sticky=N+E+S+W)
+        tk.Label(window, text='Show metrics:').grid(row=3, column=0, sticky=W)
+        tk.Checkbutton(window, text='Enabled',
+                       variable=settings.canvas.get_metrics_var()).grid(
+                           row=3, column=1, sticky=N+S+W)
+        tk.Label(window, text='Export anti-aliasing [samples, threshold]:'
+                 ).grid(row=4, column=0, sticky=W)
+        tke.IntEntry(
+            window,
+            textvariable=settings.canvas.get_antialias_samples_var()).grid(
+                row=4, column=1, sticky=N+E+S+W)
+        tke.IntEntry(
+            window,
+            textvariable=settings.canvas.get_antialias_threshold_var()).grid(
+                row=4, column=2, sticky=N+E+S+W)
+        tk.Label(window, text='Render cache [MB]:').grid(
+            row=5, column=0, sticky=W)
+        entry = tke.IntEntry(
+            window, textvariable=settings.canvas.get_cache_size_var())
+        entry.grid(row=5, column=1, sticky=N+E+S+W)
+        self.bind_entered(entry, self.enable_cache)
+        tk.Button(window, text='Clear', command=self.clear_cache).grid(
+            row=5, column=2, sticky=N+E+S+W)
+        tk.Label(window, text='Precision:').grid(row=6, column=0, sticky=W)
+        tk.OptionMenu(window, settings.canvas.get_precision_var(),
+                      'auto', *render.PRECISIONS).grid(
+                          row=6, column=1, columnspan=2, sticky=N+E+S+W)
+
+    def clear_cache(self):
+        if cache.CACHE:
+            cache.CACHE.clear()
+            self.status_var.set(cache.CACHE.summary())
 
     def mandelbrot_settings(self):
         window = tke.Toplevel(self.parent)
@@ -262,10 +593,13 @@ class Chaos:
                 row=0, column=1)
         tk.Label(window, text='Max. Iterations:').grid(
             row=1, column=0, sticky=W)
-        tke.IntEntry(
-            window,
-            textvariable=settings.mandelbrot.get_max_iter_var()).grid(
-                row=1, column=1)
+        entry = tke.IntEntry(
+            window, textvariable=settings.mandelbrot.get_max_iter_var())
+        entry.grid(row=1, column=1)
+        self.bind_continue(entry, mandelbrot, settings.mandelbrot)
+        tk.Checkbutton(window, text='Auto',
+                       variable=settings.mandelbrot.get_auto_max_iter_var()
+                       ).grid(row=1, column=2, sticky=N+S+W)
         tk.Label(window, text='Coloring:').grid(row=2, column=0, sticky=W)
         tk.OptionMenu(window, settings.mandelbrot.get_coloring_var(),
                       *coloring.colorings.keys()).grid(
@@ -292,10 +626,13 @@ class Chaos:
                 row=1, column=1)
         tk.Label(window, text='Max. Iterations:').grid(
             row=2, column=0, sticky=W)
-        tke.IntEntry(
-            window,
-            textvariable=settings.julia.get_max_iter_var()).grid(
-                row=2, column=1)
+        entry = tke.IntEntry(
+            window, textvariable=settings.julia.get_max_iter_var())
+        entry.grid(row=2, column=1)
+        self.bind_continue(entry, julia, settings.julia)
+        tk.Checkbutton(window, text='Auto',
+                       variable=settings.julia.get_auto_max_iter_var()
+                       ).grid(row=2, column=2, columnspan=3, sticky=N+S+W)
         tk.Label(window, text='Coloring:').grid(row=3, column=0, sticky=W)
         tk.OptionMenu(window, settings.julia.get_coloring_var(),
                       *coloring.colorings.keys()).grid(
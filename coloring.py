@@ -11,58 +11,68 @@ Description: This module contains the coloring functions.
 import collections
 
 import settings
+import palette
 
 # TODO: implement more coloring algorithms:
 #       here are some: http://www.eddaardvark.co.uk/python_patterns/schemes.html
 
-# TODO: refactor so that itermax is not needed as a parameter to the coloring
-#       functions. it is constant and can be passed to the factory function
-#       instead.
-
 # TODO: consider this link when experimenting with colors:
 #       http://stackoverflow.com/questions/24852345/hsv-to-rgb-color-conversion
 
 colorings = None
 
-def simple_modulo(inside_color, *colors):
-    l = len(colors)
-    def f(complex_coord, complex_value, iter_max, iter_count):
-        if iter_count >= iter_max:
-            return inside_color
-        else:
-            return colors[iter_count % l]
-    return f
+def simple_modulo(inside_color, *colors, itermax=None):
+    return palette.palette_coloring(
+        palette.modulo_palette(inside_color, *colors),
+        itermax)
 
 def simple_shading(inside_color, start_color, stop_color, iter_max):
-    delta = ((stop_color[0] - start_color[0]) / iter_max,
-             (stop_color[1] - start_color[1]) / iter_max,
-             (stop_color[2] - start_color[2]) / iter_max)
-    def f(complex_coord, complex_value, iter_max, iter_count):
-        if iter_count >= iter_max:
-            return inside_color
-        else:
-            return (int(start_color[0] + iter_count * delta[0]),
-                    int(start_color[1] + iter_count * delta[1]),
-                    int(start_color[2] + iter_count * delta[2]))
-    return f
+    return palette.palette_coloring(
+        palette.shading_palette(inside_color, start_color, stop_color,
+                                iter_max),
+        iter_max)
+
+def histogram_shading(inside_color, start_color, stop_color):
+    return palette.histogram_coloring(
+        palette.equalized_palette(inside_color, start_color, stop_color))
+
+def distance_shading(inside_color, edge_color, outside_color):
+    return palette.distance_coloring(inside_color, edge_color, outside_color)
 
 
 def initialize():
     global colorings
-    c = settings.coloring
-    colorings = collections.OrderedDict([
+    colorings = create_colorings(settings.coloring)
+
+
+def create_colorings(c):
+    """ returns the colorings by name, c are the coloring settings (or
+    settings.defaults('coloring')). every coloring is a function taking
+    max_iter, which returns the coloring function for render.render().
+    """
+    return collections.OrderedDict([
         ('Default', lambda *_: None),
-        ('Modulo 2', lambda *_: simple_modulo(
+        ('Modulo 2', lambda max_iter, *_: simple_modulo(
             (c.modulo2_i_r, c.modulo2_i_g, c.modulo2_i_b),
             (c.modulo2_0_r, c.modulo2_0_g, c.modulo2_0_b),
-            (c.modulo2_1_r, c.modulo2_1_g, c.modulo2_1_b))),
-        ('Modulo 3', lambda *_: simple_modulo(
+            (c.modulo2_1_r, c.modulo2_1_g, c.modulo2_1_b),
+            itermax=max_iter)),
+        ('Modulo 3', lambda max_iter, *_: simple_modulo(
             (c.modulo3_i_r, c.modulo3_i_g, c.modulo3_i_b),
             (c.modulo3_0_r, c.modulo3_0_g, c.modulo3_0_b),
             (c.modulo3_1_r, c.modulo3_1_g, c.modulo3_1_b),
-            (c.modulo3_2_r, c.modulo3_2_g, c.modulo3_2_b))),
+            (c.modulo3_2_r, c.modulo3_2_g, c.modulo3_2_b),
+            itermax=max_iter)),
         ('Simple Shading', lambda max_iter, *_: simple_shading(
             (255, 255, 255),
             (255, 255, 255),
             (0, 0, 0),
-            max_iter))])
+            max_iter)),
+        ('Histogram Shading', lambda *_: histogram_shading(
+            (255, 255, 255),
+            (255, 255, 255),
+            (0, 0, 0))),
+        ('Distance', lambda *_: distance_shading(
+            (0, 0, 0),
+            (0, 0, 0),
+            (255, 255, 255)))])
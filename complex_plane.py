@@ -1,8 +1,41 @@
 #!/usr/bin/env python
 
+import collections
+
+import numpy as np
 from PIL import Image
-from PIL import ImageDraw
-from PIL import ImageTk
+
+import metrics
+
+def grid(start, delta, xs, ys):
+  """ returns the complex coords of the pixels xs times ys of a plane
+  starting at start with a pixel size of delta as an array indexed [y, x].
+  """
+  coords = np.empty((len(ys), len(xs)), dtype=complex)
+  coords.real = np.asarray(xs) * delta.real + start.real
+  coords.imag = (np.asarray(ys) * delta.imag + start.imag)[:, np.newaxis]
+  return coords
+
+
+def points(start, delta, xs, ys):
+  """ returns the complex coords of the single pixels (xs[n], ys[n]) of a
+  plane starting at start with a pixel size of delta as an array of the
+  shape of xs.
+  """
+  coords = np.empty(np.shape(xs), dtype=complex)
+  coords.real = np.asarray(xs) * delta.real + start.real
+  coords.imag = np.asarray(ys) * delta.imag + start.imag
+  return coords
+
+
+def pixel_delta(start, end, width, height):
+  """ returns the size of a pixel of a plane of width x height pixels
+  from start to end as a complex number (real: width, imag: height)
+  """
+  start, end = complex(start), complex(end)
+  return complex((end.real - start.real) / width,
+                 (end.imag - start.imag) / height)
+
 
 class ComplexPlane:
 
@@ -33,37 +66,174 @@ class ComplexPlane:
 
   def __init__(self,
                width, height, # in pixels
-               start, end):   # complex coordinates
-    """ creates a complex plane """
+               start, end,    # complex coordinates
+               origin=(0, 0), delta=None):
+    """ creates a complex plane. origin and delta are used by tile(),
+    the pixel (x, y) is at start + (origin + (x, y)) * delta.
+    """
     super().__init__()
-    self.img = Image.new("RGB", (width, height))
-    self.draw = ImageDraw.Draw(self.img)
+    self.size = (width, height)
+    # the pixels are stored as RGBA with an opaque alpha channel, because
+    # PIL can share a 4 byte per pixel buffer without copying it.
+    self.pixels = np.zeros((height, width, 4), dtype=np.uint8)
+    self.pixels[:, :, 3] = 255
+    self.img = None
+    # the iteration field, see init_field()
+    self.iterations = None
+    self.values = None
+    self.distances = None
+    self.z = None
+    self.itermax = None
+    self.parameter = None
+    self.bailout = None
+    self.precision = None
+    # counters of the renderer, e.g. the number of 'iterated' pixels
+    self.statistics = collections.Counter()
+    # timings of the render stages, see metrics.py
+    self.metrics = metrics.RenderMetrics(self)
     self.start = complex(start)
     self.end = complex(end)
-    self.delta = complex((self.end.real - self.start.real) / width,
-                         (self.end.imag - self.start.imag) / height)
+    # the view as it was given, start and end may have more precision than
+    # a complex number (see deep_zoom.py). tiles keep the view of their plane.
+    self.view = (start, end, width, height)
+    self.origin = origin
+    if delta is None:
+      delta = pixel_delta(self.start, self.end, width, height)
+    self.delta = complex(delta)
 
   def __iter__(self):
     return ComplexPlane.ComplexPlaneIterator(
-      self.img.size,
+      self.size,
       self.p2c)
 
   def c2p(self, z):
     """ returns the pixel coord for complex z """
-    z = (z - self.start) * self.delta
-    return (int(z.real + 0.5), int(z.imag + 0.5))
+    z = z - self.start
+    return (int(z.real / self.delta.real + 0.5) - self.origin[0],
+            int(z.imag / self.delta.imag + 0.5) - self.origin[1])
 
   def p2c(self, p):
     """ returns the complex coord for pixel p """
-    return complex(p[0] * self.delta.real, p[1] * self.delta.imag) + self.start
+    x, y = p[0] + self.origin[0], p[1] + self.origin[1]
+    return complex(x * self.delta.real, y * self.delta.imag) + self.start
+
+  def coordinates(self, rows=None):
+    """ returns the complex coords of all pixels (or only of the given
+    rows, a range) as an array indexed [y, x]. the values are exactly the
+    same as p2c would return.
+    """
+    width, height = self.size
+    if rows is None:
+      rows = range(height)
+    return self.grid(range(width), rows)
+
+  def grid(self, xs, ys):
+    """ returns the complex coords of the pixels xs times ys as an array
+    indexed [y, x] (see grid()).
+    """
+    return grid(self.start, self.delta,
+                np.asarray(xs) + self.origin[0],
+                np.asarray(ys) + self.origin[1])
+
+  def points(self, xs, ys):
+    """ returns the complex coords of the single pixels (xs[n], ys[n]) as
+    an array (see points()).
+    """
+    return points(self.start, self.delta,
+                  np.asarray(xs) + self.origin[0],
+                  np.asarray(ys) + self.origin[1])
+
+  def tile(self, x, y, width, height):
+    """ returns a plane for the block of width x height pixels with the
+    upper left corner (x, y). the tile computes exactly the same complex
+    coords as this plane and shares the pixels, the iteration field, the
+    statistics and the metrics with it.
+    """
+    origin = (self.origin[0] + x, self.origin[1] + y)
+    tile = ComplexPlane(width, height,
+                        self.start, self.p2c((x + width, y + height)),
+                        origin, self.delta)
+    tile.view = self.view
+    block = (slice(y, y + height), slice(x, x + width))
+    tile.pixels = self.pixels[block]
+    if self.iterations is not None:
+      tile.iterations = self.iterations[block]
+      tile.values = self.values[block]
+      tile.z = self.z[block]
+      if self.distances is not None:
+        tile.distances = self.distances[block]
+      tile.itermax = self.itermax
+      tile.parameter = self.parameter
+      tile.bailout = self.bailout
+      tile.precision = self.precision
+    tile.statistics = self.statistics
+    tile.metrics = self.metrics
+    return tile
+
+  def init_field(self, itermax, parameter=None, bailout=2.0,
+                 distance=False, precision=None):
+    """ allocates the iteration field: the iteration counts and the absolute
+    values of the final z of all pixels, so the plane can be colored again
+    without iterating. parameter is the julia parameter c or None for the
+    mandelbrot set. itermax, parameter and bailout are kept, so more points
+    of the plane can be iterated later (see antialias.py).
+    the final z of the pixels is kept as well (z, nan for the pixels which
+    were not iterated), so the pixels which did not escape can be iterated
+    on to a higher itermax (see render.resume()).
+    with distance the field gets the estimated distances of the pixels to
+    the set as well (see escape_time.distances()).
+    precision is the one the pixels are iterated with (see
+    render.PRECISIONS), None chooses it from the size of the pixels.
+    """
+    width, height = self.size
+    dtype = np.uint16 if itermax < 2 ** 16 else np.uint32
+    if self.iterations is not None and self.iterations.dtype == dtype:
+      # keep the arrays, they may be shared with tiles
+      self.iterations[...] = 0
+      self.values[...] = 0
+      self.z[...] = np.nan
+    else:
+      self.iterations = np.zeros((height, width), dtype=dtype)
+      self.values = np.zeros((height, width), dtype=np.float32)
+      self.z = np.full((height, width), np.nan, dtype=complex)
+    if not distance:
+      self.distances = None
+    elif self.distances is not None:
+      self.distances[...] = 0
+    else:
+      self.distances = np.zeros((height, width), dtype=np.float32)
+    self.itermax = itermax
+    self.parameter = parameter
+    self.bailout = bailout
+    self.precision = precision
+
+  def set_field(self, counts, z, y=0, x=0):
+    """ stores the iteration counts and final z of the block of pixels with
+    the upper left corner (x, y) in the iteration field
+    """
+    h, w = np.shape(counts)
+    self.iterations[y:y + h, x:x + w] = counts
+    self.values[y:y + h, x:x + w] = np.abs(z)
+    self.z[y:y + h, x:x + w] = z
 
   def set_pixel(self, p, color):
     """ sets the pixel p to color """
-    self.draw.point(p, color)
+    self.pixels[p[1], p[0], :3] = color
+
+  def get_pixel(self, p):
+    """ returns the color of pixel p """
+    return tuple(self.pixels[p[1], p[0], :3].tolist())
+
+  def set_row(self, y, colors):
+    """ sets all pixels of row y to colors, an array of shape (width, 3) """
+    self.pixels[y, :, :3] = colors
 
-#  def get_pixel(self, p):
-#    """ returns the color of pixel p """
-#    return self.image.get(p)
+  def set_block(self, x, y, colors):
+    """ sets the pixels of the block with the upper left corner (x, y)
+    to colors, an array of shape (height, width, 3)
+    """
+    h, w = colors.shape[:2]
+    self.pixels[y:y + h, x:x + w, :3] = colors
 
   def set_complex(self, z, color):
     """ sets the corresponding pixel of complex z to color """
@@ -73,13 +243,32 @@ class ComplexPlane:
 #    """ returns the color of the pixel coresponding to complex z """
 #    return self.get_pixel(self.c2p(z))
 
+  def upscale(self, step):
+    """ blows up the pixels on the grid of step (the pixels (x, y) with
+    x % step == 0 and y % step == 0) to blocks of step x step pixels.
+    this is used to preview coarse renders.
+    """
+    width, height = self.size
+    ys = np.arange(height) // step * step
+    xs = np.arange(width) // step * step
+    self.pixels[:] = self.pixels[ys[:, np.newaxis], xs]
+
   def get_pil_image(self):
+    """ returns a PIL.Image (mode RGBA) sharing the memory of the pixels """
+    if self.img is None:
+      with self.metrics.stage('image'):
+        self.img = Image.frombuffer('RGBA', self.size, self.pixels,
+                                    'raw', 'RGBA', 0, 1)
     return self.img
 
   def get_tk_image(self):
     """ returns an tkinter.PhotoImage instance for
     """
-    tki = ImageTk.PhotoImage(self.img)
+    # imported here, so the plane can be used without tk (see batch.py)
+    from PIL import ImageTk
+    image = self.get_pil_image()
+    with self.metrics.stage('tk image'):
+      tki = ImageTk.PhotoImage(image)
      # we need to keep a reference, otherwise gc would kick in by mistake
     self.__work_around = tki
     return tki
@@ -0,0 +1,333 @@
+#!/usr/bin/env python
+"""
+Filename: deep_zoom.py
+Author: Lukas Singer <lukas42singer (at) gmail (dot) com>
+Created: 2026/10/18
+Copyright: 2026, Lukas Singer
+License: WTFPL (see COPYING or <http://www.wtfpl.net/>)
+Description: Deep zooms with perturbation theory.
+
+  a double has got about 16 significant digits, so when the pixels get
+  closer to each other than about 1e-13 (relative to their coordinates)
+  neighbouring pixels get the same coordinates and the image gets blocky.
+
+  perturbation: the orbit Z of a single reference point C (the center of
+  the view) is computed with arbitrary precision (decimal). every other
+  pixel c = C + dc only iterates its difference dz = z - Z to that orbit:
+
+    dz = 2 * Z * dz + dz * dz + dc
+
+  dc and dz are tiny, but a double can hold tiny numbers with full
+  precision, so this works with doubles and numpy again.
+
+  when z gets close to 0 (closer than dz is to it) the difference to the
+  reference gets bigger than z itself and the result would be garbage
+  (a glitch). this is detected and the pixel is rebased: it continues with
+  the start of the reference orbit, dz = z - Z[0] (zhuoran's rebasing).
+  the same happens when the reference orbit escapes before the pixel.
+"""
+
+import collections
+import decimal
+
+import numpy as np
+
+# views with pixels closer than this (relative to the coordinates) are
+# rendered with perturbation, see is_deep().
+DEEP_ZOOM_THRESHOLD = 1e-13
+
+# the number of digits computed beyond the ones needed to tell the pixels
+# apart. never less than MIN_PRECISION digits are used.
+GUARD_DIGITS = 20
+MIN_PRECISION = 28
+
+
+class Point(collections.namedtuple('Point', ('real', 'imag'))):
+    """ a complex coordinate with arbitrary precision. real and imag are
+    decimals, complex(point) rounds it to a normal complex number.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, real, imag=0):
+        return super().__new__(cls, decimal.Decimal(real),
+                               decimal.Decimal(imag))
+
+    @classmethod
+    def from_complex(cls, z):
+        """ returns z (a number or a Point) as a Point. floats are
+        converted exactly.
+        """
+        if isinstance(z, Point):
+            return z
+        z = complex(z)
+        return cls(z.real, z.imag)
+
+    def __complex__(self):
+        return complex(float(self.real), float(self.imag))
+
+    def __str__(self):
+        return '({} + {} i)'.format(self.real, self.imag)
+
+
+def exact():
+    """ returns a decimal context in which adding, subtracting and
+    multiplying never rounds. don't divide in it.
+    """
+    return decimal.localcontext(prec=decimal.MAX_PREC,
+                                Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN)
+
+
+def precision(start, end, pixels=1):
+    """ returns the number of significant digits needed for the pixel
+    coordinates of a view from start to end (Points) which is pixels
+    pixels wide or high.
+    """
+    with exact():
+        sizes = [abs(end.real - start.real), abs(end.imag - start.imag)]
+    scale = max([n.adjusted() for n in start + end if n] + [0])
+    size = min([n.adjusted() for n in sizes if n] + [scale])
+    return max(MIN_PRECISION,
+               scale - size + len(str(pixels)) + GUARD_DIGITS)
+
+
+def context(start, end, pixels=1):
+    """ returns a decimal context precise enough for the pixel coordinates
+    of a view from start to end (see precision()).
+    """
+    return decimal.localcontext(prec=precision(start, end, pixels))
+
+
+def frame(plane):
+    """ returns the exact start and pixel size (delta) of the whole view of
+    the plane (the plane the tile was taken from for tiles) as Points and
+    the precision of the coordinates.
+    """
+    start, end, width, height = plane.view
+    start, end = Point.from_complex(start), Point.from_complex(end)
+    digits = precision(start, end, max(width, height))
+    with decimal.localcontext(prec=digits):
+        delta = Point((end.real - start.real) / width,
+                      (end.imag - start.imag) / height)
+    return start, delta, digits
+
+
+def p2c(plane, p):
+    """ returns the exact complex coord of pixel p as a Point, see
+    ComplexPlane.p2c()
+    """
+    start, delta, digits = frame(plane)
+    x, y = p[0] + plane.origin[0], p[1] + plane.origin[1]
+    with decimal.localcontext(prec=digits):
+        return Point(start.real + x * delta.real, start.imag + y * delta.imag)
+
+
+def is_deep(plane):
+    """ returns True if the pixels of the plane are too close to each other
+    for double precision
+    """
+    scale = max(abs(plane.start), abs(plane.end), 1.0)
+    pixel = min(abs(plane.delta.real), abs(plane.delta.imag))
+    return pixel < DEEP_ZOOM_THRESHOLD * scale
+
+
+class Reference:
+    """ the orbit of the center of the view of a plane, computed with
+    arbitrary precision. field() iterates any pixels of the plane (or its
+    tiles) as perturbations of it, so the orbit is computed only once per
+    render.
+    """
+
+    def __init__(self, plane, bailout=2.0, itermax=256, parameter=None):
+        start, delta, digits = frame(plane)
+        width, height = plane.view[2:]
+        self.center = (width // 2, height // 2)
+        with decimal.localcontext(prec=digits):
+            center = Point(start.real + self.center[0] * delta.real,
+                           start.imag + self.center[1] * delta.imag)
+        self.delta = complex(delta)
+        self.bailout = bailout
+        self.itermax = itermax
+        self.parameter = parameter
+        self._digits = digits
+        if parameter is None:
+            # mandelbrot: Z starts at 0 and is C after the first iteration.
+            self._z, self._c = Point(0), center
+        else:
+            # julia: Z starts at C and c is the parameter for all pixels.
+            self._z, self._c = center, Point.from_complex(parameter)
+        self.orbit, self._z = _orbit(self._z, self._c, bailout, itermax,
+                                     digits)
+
+    def extend(self, itermax):
+        """ iterates the reference orbit on up to itermax, unless it
+        escaped already. the pixels are iterated up to itermax then.
+        """
+        if itermax <= self.itermax:
+            return
+        if len(self.orbit[0]) > self.itermax and not _escaped(
+                self._z, self.bailout, self._digits):
+            (real, imag), self._z = _orbit(self._z, self._c, self.bailout,
+                                           itermax - self.itermax,
+                                           self._digits)
+            self.orbit = (np.concatenate((self.orbit[0], real[1:])),
+                          np.concatenate((self.orbit[1], imag[1:])))
+        self.itermax = itermax
+
+    def _offsets(self, plane, xs, ys):
+        # the offsets of the pixels to the reference point
+        return (((np.ravel(xs) + (plane.origin[0] - self.center[0]))
+                 * self.delta.real),
+                ((np.ravel(ys) + (plane.origin[1] - self.center[1]))
+                 * self.delta.imag))
+
+    def field(self, plane, xs, ys, statistics=None, derivative=False,
+              differences=False):
+        """ returns the final z and the iteration counts of the pixels
+        (xs[n], ys[n]) of plane like escape_time.field() (without its
+        shortcuts). the number of rebased pixels is counted as 'rebased'
+        in statistics, the iteration steps as 'iterations'.
+        with derivative the derivatives of the final z are returned as
+        well (see escape_time.iterate()), with differences the final
+        differences dz to the orbit and the indices of their orbit points
+        too, to resume() the pixels which did not escape.
+        """
+        dcr, dci = self._offsets(plane, xs, ys)
+        if self.parameter is None:
+            # like escape_time: start with z = c and i = 1.
+            i = 1
+            dr, di = dcr, dci
+        else:
+            # the offsets are the start values, c is the same for all.
+            i = 0
+            dr, di = dcr, dci
+            dcr, dci = 0.0, 0.0
+        return self._iterate(np.shape(xs), dr, di, np.full(dr.shape, i), i,
+                             dcr, dci, statistics, derivative, differences)
+
+    def resume(self, plane, xs, ys, differences, indices, iter_start,
+               statistics=None):
+        """ iterates the pixels (xs[n], ys[n]) of plane which did not escape
+        within iter_start iterations on up to itermax, from the differences
+        and the indices field() returned for them (the orbit may have been
+        extended in between, see extend()). returns the final z, the
+        iteration counts, the differences and the indices like field().
+        z itself is not enough, rounded to a double it lost the digits
+        which tell the pixels apart.
+        """
+        dcr, dci = self._offsets(plane, xs, ys)
+        if self.parameter is not None:
+            dcr, dci = 0.0, 0.0
+        differences = np.ravel(differences)
+        return self._iterate(np.shape(xs), differences.real,
+                             differences.imag, np.ravel(indices),
+                             iter_start, dcr, dci, statistics,
+                             differences=True)
+
+    def _iterate(self, shape, dr, di, m, i, dcr, dci, statistics,
+                 derivative=False, differences=False):
+        # iterates the differences dr, di to the orbit points m from the
+        # iteration i on, see field()
+        orbit_r, orbit_i = self.orbit
+        last = len(orbit_r) - 1
+        z = np.empty(dr.shape, dtype=complex)
+        z.real = orbit_r[m] + dr
+        z.imag = orbit_i[m] + di
+        counts = np.full(dr.shape, i, dtype=np.uint32)
+        active = np.flatnonzero(np.hypot(z.real, z.imag) < self.bailout)
+        zr, zi = z.real[active], z.imag[active]
+        dr, di, m = dr[active], di[active], m[active]
+        if self.parameter is None:
+            dcr, dci = dcr[active], dci[active]
+        if derivative:
+            # the derivative of z, dz/dc or dz/dz0, both start with 1
+            dz = np.ones(z.shape, dtype=complex)
+            ar, ai = dz.real[active], dz.imag[active]
+            one = 1.0 if self.parameter is None else 0.0
+        steps = 0
+        while active.size and i < self.itermax:
+            steps += active.size
+            # rebase the glitching pixels and the ones at the end of the
+            # reference orbit.
+            rebase = m == last
+            rebase |= (np.hypot(zr - orbit_r[0], zi - orbit_i[0])
+                       < np.hypot(dr, di))
+            if rebase.any():
+                dr = np.where(rebase, zr - orbit_r[0], dr)
+                di = np.where(rebase, zi - orbit_i[0], di)
+                m[rebase] = 0
+                if statistics is not None:
+                    statistics['rebased'] += int(rebase.sum())
+            if derivative:
+                ar, ai = (2 * (zr * ar - zi * ai) + one,
+                          2 * (zr * ai + zi * ar))
+            rr, ri = orbit_r[m], orbit_i[m]
+            dr, di = (2 * (rr * dr - ri * di) + dr * dr - di * di + dcr,
+                      2 * (rr * di + ri * dr) + 2 * dr * di + dci)
+            m += 1
+            i += 1
+            zr = orbit_r[m] + dr
+            zi = orbit_i[m] + di
+            keep = np.hypot(zr, zi) < self.bailout
+            if not keep.all():
+                outside = ~keep
+                escaped = active[outside]
+                z.real[escaped] = zr[outside]
+                z.imag[escaped] = zi[outside]
+                counts[escaped] = i
+                active = active[keep]
+                zr, zi = zr[keep], zi[keep]
+                dr, di, m = dr[keep], di[keep], m[keep]
+                if self.parameter is None:
+                    dcr, dci = dcr[keep], dci[keep]
+                if derivative:
+                    dz.real[escaped] = ar[outside]
+                    dz.imag[escaped] = ai[outside]
+                    ar, ai = ar[keep], ai[keep]
+        z.real[active] = zr
+        z.imag[active] = zi
+        counts[active] = i
+        if statistics is not None:
+            statistics['iterations'] += steps
+        result = z.reshape(shape), counts.reshape(shape)
+        if derivative:
+            dz.real[active] = ar
+            dz.imag[active] = ai
+            result += (dz.reshape(shape),)
+        if differences:
+            # the escaped pixels can't be resumed
+            d = np.full(z.shape, np.nan, dtype=complex)
+            d.real[active] = dr
+            d.imag[active] = di
+            index = np.zeros(z.shape, dtype=int)
+            index[active] = m
+            result += (d.reshape(shape), index.reshape(shape))
+        return result
+
+
+def _escaped(z, bailout, digits):
+    """ returns True if the decimal point z is outside of the bailout """
+    with decimal.localcontext(prec=digits):
+        return z.real * z.real + z.imag * z.imag >= (
+            decimal.Decimal(bailout) ** 2)
+
+
+def _orbit(z, c, bailout, itermax, digits):
+    """ iterates z = z * z + c with digits significant digits until z
+    escapes or for itermax iterations. returns the real and the imaginary
+    parts of the orbit (starting with z) as arrays of doubles, at least two
+    values long, and its last z as a Point.
+    """
+    bailout = decimal.Decimal(bailout) ** 2
+    with decimal.localcontext(prec=digits):
+        zr, zi = z
+        cr, ci = c
+        orbit = [complex(z)]
+        for n in range(max(itermax, 1)):
+            zr2, zi2 = zr * zr, zi * zi
+            if zr2 + zi2 >= bailout and n:
+                break
+            zr, zi = zr2 - zi2 + cr, 2 * zr * zi + ci
+            orbit.append(complex(float(zr), float(zi)))
+    orbit = np.array(orbit, dtype=complex)
+    return (orbit.real.copy(), orbit.imag.copy()), Point(zr, zi)
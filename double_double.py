@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+"""
+Filename: double_double.py
+Author: Lukas Singer <lukas42singer (at) gmail (dot) com>
+Created: 2026/10/18
+Copyright: 2026, Lukas Singer
+License: WTFPL (see COPYING or <http://www.wtfpl.net/>)
+Description: Zooms just past doubles with double-double arithmetic.
+
+  a double-double is the sum hi + lo of two doubles (lo is smaller than
+  the last digit of hi), it has got about 32 significant digits. sums and
+  products of them are computed with the error free transformations
+  two_sum (knuth) and two_prod (dekker), which only need additions and
+  multiplications of doubles, so numpy can iterate whole arrays of them.
+
+  every pixel is iterated on its own, like with doubles, so there is no
+  reference orbit and no glitch (see deep_zoom.py). but a step costs about
+  ten times as much, so this only pays off for zooms which are too deep
+  for doubles and not much deeper (see render.PRECISIONS).
+"""
+
+import decimal
+
+import numpy as np
+
+import deep_zoom
+
+# pixels closer than this (relative to their coordinates) can't be told
+# apart with double-doubles anymore.
+THRESHOLD = 1e-28
+
+# 2 ** 27 + 1, splits a double into two halves of 26 bits (see _split)
+_SPLITTER = 134217729.0
+
+
+def split(n):
+    """ returns the decimal n as a double-double (hi, lo) """
+    hi = float(n)
+    with deep_zoom.exact():
+        lo = float(decimal.Decimal(n) - decimal.Decimal(hi))
+    return hi, lo
+
+
+def _two_sum(a, b):
+    # s + e == a + b exactly
+    s = a + b
+    v = s - a
+    return s, (a - (s - v)) + (b - v)
+
+
+def _quick_two_sum(a, b):
+    # like _two_sum, if |a| >= |b|
+    s = a + b
+    return s, b - (s - a)
+
+
+def _split(a):
+    t = _SPLITTER * a
+    hi = t - (t - a)
+    return hi, a - hi
+
+
+def _two_prod(a, b):
+    # p + e == a * b exactly
+    p = a * b
+    ah, al = _split(a)
+    bh, bl = _split(b)
+    return p, ((ah * bh - p) + ah * bl + al * bh) + al * bl
+
+
+def _add(ah, al, bh, bl):
+    s, e = _two_sum(ah, bh)
+    return _quick_two_sum(s, e + al + bl)
+
+
+def _mul(ah, al, bh, bl):
+    p, e = _two_prod(ah, bh)
+    return _quick_two_sum(p, e + ah * bl + al * bh)
+
+
+def coordinates(plane, xs, ys):
+    """ returns the coordinates of the pixels (xs[n], ys[n]) of the plane
+    (see ComplexPlane.points()) as double-doubles (real hi, real lo,
+    imag hi, imag lo), computed from the exact view (see deep_zoom.frame()).
+    """
+    start, delta, digits = deep_zoom.frame(plane)
+    xs = np.ravel(xs) + plane.origin[0]
+    ys = np.ravel(ys) + plane.origin[1]
+    real = _add(*_mul(*split(delta.real), xs, 0.0), *split(start.real))
+    imag = _add(*_mul(*split(delta.imag), ys, 0.0), *split(start.imag))
+    return real + imag
+
+
+def field(plane, xs, ys, bailout=2.0, itermax=256, parameter=None,
+          statistics=None, derivative=False):
+    """ returns the final z and the iteration counts of the pixels
+    (xs[n], ys[n]) of the plane like escape_time.field() (without its
+    shortcuts), iterated with double-doubles. z is rounded to a double.
+    the iteration steps are counted as 'iterations' in statistics.
+    with derivative the derivatives of the final z are returned as well
+    (see escape_time.iterate()), computed with doubles.
+    """
+    shape = np.shape(xs)
+    pr, prl, pi, pil = coordinates(plane, xs, ys)
+    if parameter is None:
+        # like escape_time: start with z = c and i = 1.
+        i = 1
+        cr, crl, ci, cil = pr, prl, pi, pil
+    else:
+        i = 0
+        cr, crl, ci, cil = parameter.real, 0.0, parameter.imag, 0.0
+    z = np.empty(pr.shape, dtype=complex)
+    z.real, z.imag = pr, pi
+    counts = np.full(pr.shape, i, dtype=np.uint32)
+    active = np.flatnonzero(np.hypot(pr, pi) < bailout)
+    zr, zrl, zi, zil = pr[active], prl[active], pi[active], pil[active]
+    if parameter is None:
+        cr, crl, ci, cil = cr[active], crl[active], ci[active], cil[active]
+    if derivative:
+        dz = np.ones(z.shape, dtype=complex)
+        dr, di = dz.real[active], dz.imag[active]
+        one = 1.0 if parameter is None else 0.0
+    steps = 0
+    while active.size and i < itermax:
+        steps += active.size
+        if derivative:
+            dr, di = 2 * (zr * dr - zi * di) + one, 2 * (zr * di + zi * dr)
+        # zr * zr - zi * zi + cr and 2 * zr * zi + ci, see _two_prod()
+        rh, rl = _split(zr)
+        ih, il = _split(zi)
+        rr = zr * zr
+        rre = ((rh * rh - rr) + 2 * rh * rl) + rl * rl + 2 * zr * zrl
+        ii = zi * zi
+        iie = ((ih * ih - ii) + 2 * ih * il) + il * il + 2 * zi * zil
+        ri = zr * zi
+        rie = (((rh * ih - ri) + rh * il + rl * ih) + rl * il
+               + zr * zil + zrl * zi)
+        s, e = _two_sum(rr, -ii)
+        zr, zrl = _add(s, e + rre - iie, cr, crl)
+        zi, zil = _add(2 * ri, 2 * rie, ci, cil)
+        i += 1
+        keep = np.hypot(zr, zi) < bailout
+        if not keep.all():
+            outside = ~keep
+            escaped = active[outside]
+            z.real[escaped] = zr[outside]
+            z.imag[escaped] = zi[outside]
+            counts[escaped] = i
+            active = active[keep]
+            zr, zrl, zi, zil = zr[keep], zrl[keep], zi[keep], zil[keep]
+            if parameter is None:
+                cr, crl, ci, cil = cr[keep], crl[keep], ci[keep], cil[keep]
+            if derivative:
+                dz.real[escaped] = dr[outside]
+                dz.imag[escaped] = di[outside]
+                dr, di = dr[keep], di[keep]
+    z.real[active] = zr
+    z.imag[active] = zi
+    counts[active] = i
+    if statistics is not None:
+        statistics['iterations'] += steps
+    if derivative:
+        dz.real[active] = dr
+        dz.imag[active] = di
+        return z.reshape(shape), counts.reshape(shape), dz.reshape(shape)
+    return z.reshape(shape), counts.reshape(shape)
@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+"""
+Filename: escape_time.py
+Author: Lukas Singer <lukas42singer (at) gmail (dot) com>
+Created: 2026/10/18
+Copyright: 2026, Lukas Singer
+License: WTFPL (see COPYING or <http://www.wtfpl.net/>)
+Description: Vectorized escape time algorithm working on whole planes.
+"""
+
+import collections
+
+import numpy as np
+
+# an orbit which comes back closer than this (in the real and in the
+# imaginary part) to a value it had before is periodic and never escapes.
+PERIODICITY_TOLERANCE = 1e-12
+
+# the escaped points are iterated up to DISTANCE_STEPS more times, until
+# they are DISTANCE_RADIUS away from 0, before their distance is estimated.
+# the estimate is only good for big values of z (see distances()).
+DISTANCE_STEPS = 8
+DISTANCE_RADIUS = 1e6
+
+# the floats the points are iterated with in the precisions (see
+# render.PRECISIONS) of this engine. singles are about twice as fast.
+DTYPES = {'single': np.float32, 'double': np.float64}
+
+
+def field(coordinates, bailout=2.0, itermax=256, parameter=None,
+          shortcuts=True, statistics=None, distance=False,
+          precision='double'):
+    """ returns the final z and the iteration counts for all coordinates.
+    renders the mandelbrot set when parameter is None, otherwise the julia
+    set with c = parameter.
+    with shortcuts points inside the main cardioid and the period 2 bulb
+    of the mandelbrot set are not iterated at all and periodic orbits stop
+    early (see iterate). they get the iteration count itermax, but their
+    final z is not the one the full iteration would end with.
+    statistics is a collections.Counter, it counts how many points
+    are caught by each shortcut ('cardioid', 'bulb' and 'periodic').
+    with distance the estimated distances of the points to the set (see
+    distances()) are returned as well.
+    the points are iterated with the floats of the precision (see DTYPES),
+    the coordinates and the results are complex numbers anyway.
+    """
+    dtype = DTYPES[precision]
+    if statistics is None:
+        statistics = collections.Counter()
+    tolerance = PERIODICITY_TOLERANCE if shortcuts else None
+    if parameter is not None:
+        if not distance:
+            return iterate(coordinates, parameter, bailout, itermax, 0,
+                           tolerance, statistics, dtype=dtype)
+        z, counts, dz = iterate(coordinates, parameter, bailout, itermax, 0,
+                                tolerance, statistics, 'z', dtype)
+        return z, counts, distances(z, dz, counts, itermax, parameter, 'z')
+    # like the per pixel loop we start with z = c and i = 1.
+    c = np.asarray(coordinates, dtype=complex)
+    derivative = 'c' if distance else None
+    # the orbits inside the set never leave the circle of radius 2.
+    if not shortcuts or bailout < 2 or itermax <= 1:
+        result = iterate(c, c, bailout, itermax, 1, tolerance, statistics,
+                         derivative, dtype)
+    else:
+        inside = _cardioid_or_bulb(c, statistics)
+        z = c.copy()
+        counts = np.full(c.shape, itermax, dtype=np.uint32)
+        rest = ~inside
+        result = iterate(c[rest], c[rest], bailout, itermax, 1,
+                         tolerance, statistics, derivative, dtype)
+        z[rest], counts[rest] = result[:2]
+        if distance:
+            dz = np.zeros(c.shape, dtype=complex)
+            dz[rest] = result[2]
+            result = z, counts, dz
+        else:
+            result = z, counts
+    if not distance:
+        return result
+    z, counts, dz = result
+    return z, counts, distances(z, dz, counts, itermax, c, 'c')
+
+
+def resume(z, iter_start, coordinates, bailout=2.0, itermax=256,
+           parameter=None, shortcuts=True, statistics=None,
+           precision='double'):
+    """ iterates points which did not escape within iter_start iterations
+    on from their final z up to itermax and returns the final z and the
+    iteration counts like field() does. the counts are the ones field()
+    returns for itermax, but the periodic orbits may stop at another z.
+    the points whose z is nan (e.g. points which were not iterated) are
+    iterated from the start.
+    coordinates are the coordinates of the points, precision the one of
+    the render (see field()).
+    """
+    if statistics is None:
+        statistics = collections.Counter()
+    tolerance = PERIODICITY_TOLERANCE if shortcuts else None
+    coordinates = np.asarray(coordinates, dtype=complex)
+    z = np.array(z, dtype=complex)
+    counts = np.full(z.shape, itermax, dtype=np.uint32)
+    unknown = np.isnan(z)
+    if unknown.any():
+        z[unknown], counts[unknown] = field(coordinates[unknown], bailout,
+                                            itermax, parameter, shortcuts,
+                                            statistics, precision=precision)
+    rest = ~unknown
+    if parameter is None:
+        if shortcuts and bailout >= 2:
+            # the points inside stay inside, field() didn't iterate them
+            rest &= ~_cardioid_or_bulb(coordinates, collections.Counter())
+        c = coordinates[rest]
+    else:
+        c = parameter
+    z[rest], counts[rest] = iterate(z[rest], c, bailout, itermax,
+                                    iter_start, tolerance, statistics,
+                                    dtype=DTYPES[precision])
+    return z, counts
+
+
+def iterate(z, c, bailout=2.0, itermax=256, iter_start=0,
+            tolerance=None, statistics=None, derivative=None,
+            dtype=np.float64):
+    """ iterates z = z * z + c for all points at once and returns the final
+    values of z and the iteration counts as arrays of the shape of z.
+    c is either a single complex number (julia) or an array of the same
+    shape as z (mandelbrot). the result is exactly the same as running
+
+      i = iter_start
+      while abs(z) < bailout and i < itermax:
+          z = z * z + c
+          i += 1
+
+    for every single point. escaped points are dropped from the working
+    set, so every iteration only costs as much as there are points left.
+    with a tolerance the orbits are checked for periodicity (brent's
+    method: z is saved after 1, 2, 4, 8, ... iterations and compared to
+    all values after it). periodic points get the count itermax right away
+    and are counted as 'periodic' in statistics, the number of iteration
+    steps done (of all points) as 'iterations'.
+    with a derivative the derivatives dz of the final z are returned as
+    well, dz/dc for 'c' (the mandelbrot set) or dz/dz0 for 'z' (julia
+    sets). both start with 1.
+    the real and imaginary parts are floats of the dtype while iterating
+    (the derivatives are always doubles).
+    """
+    shape = np.shape(z)
+    z = np.array(z, dtype=complex).ravel()
+    counts = np.full(z.shape, iter_start, dtype=np.uint32)
+    scalar = np.ndim(c) == 0
+    if scalar:
+        c = complex(c)
+    else:
+        c = np.broadcast_to(np.asarray(c, dtype=complex), shape).ravel()
+    active = np.flatnonzero(np.hypot(z.real, z.imag) < bailout)
+    # real and imaginary parts are iterated separately, because numpy
+    # multiplies complex numbers in a different way than python does
+    # and we want exactly the same results.
+    zr = z.real[active].astype(dtype)
+    zi = z.imag[active].astype(dtype)
+    if scalar:
+        cr, ci = dtype(c.real), dtype(c.imag)
+    else:
+        cr = c.real[active].astype(dtype)
+        ci = c.imag[active].astype(dtype)
+    if derivative is not None:
+        dz = np.ones(z.shape, dtype=complex)
+        dr, di = dz.real[active], dz.imag[active]
+        one = 1.0 if derivative == 'c' else 0.0
+    if tolerance is not None:
+        sr, si = zr.copy(), zi.copy()
+        save = 1
+    i = iter_start
+    steps = 0
+    while active.size and i < itermax:
+        steps += active.size
+        if derivative is not None:
+            # dz = 2 * z * dz + 1 (or + 0), with the z before the step
+            dr, di = 2 * (zr * dr - zi * di) + one, 2 * (zr * di + zi * dr)
+        zr, zi = zr * zr - zi * zi + cr, zr * zi + zi * zr + ci
+        i += 1
+        keep = np.hypot(zr, zi) < bailout
+        if not keep.all():
+            outside = ~keep
+            escaped = active[outside]
+            z.real[escaped] = zr[outside]
+            z.imag[escaped] = zi[outside]
+            counts[escaped] = i
+            if derivative is not None:
+                dz.real[escaped] = dr[outside]
+                dz.imag[escaped] = di[outside]
+        if tolerance is not None:
+            periodic = keep & (np.abs(zr - sr) < tolerance) & (
+                np.abs(zi - si) < tolerance)
+            if periodic.any():
+                found = active[periodic]
+                z.real[found] = zr[periodic]
+                z.imag[found] = zi[periodic]
+                counts[found] = itermax
+                if statistics is not None:
+                    statistics['periodic'] += len(found)
+                keep &= ~periodic
+        if not keep.all():
+            active = active[keep]
+            zr, zi = zr[keep], zi[keep]
+            if not scalar:
+                cr, ci = cr[keep], ci[keep]
+            if derivative is not None:
+                dr, di = dr[keep], di[keep]
+            if tolerance is not None:
+                sr, si = sr[keep], si[keep]
+        if tolerance is not None and i - iter_start == save:
+            sr, si = zr.copy(), zi.copy()
+            save *= 2
+    z.real[active] = zr
+    z.imag[active] = zi
+    counts[active] = i
+    if statistics is not None:
+        statistics['iterations'] += steps
+    if derivative is not None:
+        dz.real[active] = dr
+        dz.imag[active] = di
+        return z.reshape(shape), counts.reshape(shape), dz.reshape(shape)
+    return z.reshape(shape), counts.reshape(shape)
+
+
+def distances(z, dz, counts, itermax, c, derivative='c'):
+    """ returns the estimated distances of the points to the set, from
+    the final z, their derivatives dz (see iterate()) and their counts.
+    the points which did not escape get 0. the escaped points are iterated
+    a few more times (see DISTANCE_STEPS), then the estimate is
+
+      2 * |z| * ln|z| / |dz|
+
+    the real distance is between a quarter of it and twice it, so no point
+    of the set is closer than distance / 4.
+    c is the parameter of a julia set or the coordinates of the points.
+    """
+    shape = np.shape(z)
+    result = np.zeros(shape)
+    escaped = np.asarray(counts) < itermax
+    zs = np.asarray(z, dtype=complex)[escaped]
+    ds = np.asarray(dz, dtype=complex)[escaped]
+    if np.ndim(c):
+        c = np.broadcast_to(np.asarray(c, dtype=complex), shape)[escaped]
+    one = 1.0 if derivative == 'c' else 0.0
+    for n in range(DISTANCE_STEPS):
+        small = np.abs(zs) < DISTANCE_RADIUS
+        if not small.any():
+            break
+        ds = np.where(small, 2 * zs * ds + one, ds)
+        zs = np.where(small, zs * zs + c, zs)
+    a = np.abs(zs)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d = 2 * a * np.log(a) / np.abs(ds)
+    # the estimate fails where the derivative is 0 (at the critical point
+    # 0 of julia sets), these points get 0 like the ones near the set.
+    result[escaped] = np.where(np.isfinite(d), d, 0)
+    return result
+
+
+def _cardioid_or_bulb(c, statistics):
+    """ returns a mask of the points of c inside the main cardioid or the
+    period 2 bulb of the mandelbrot set.
+    """
+    x, y = c.real, c.imag
+    y2 = y * y
+    q = (x - 0.25) ** 2 + y2
+    cardioid = q * (q + (x - 0.25)) <= 0.25 * y2
+    bulb = ~cardioid & ((x + 1) ** 2 + y2 <= 0.0625)
+    statistics['cardioid'] += int(cardioid.sum())
+    statistics['bulb'] += int(bulb.sum())
+    return cardioid | bulb
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+"""
+Filename: jobs.py
+Author: Lukas Singer <lukas42singer (at) gmail (dot) com>
+Created: 2026/10/18
+Copyright: 2026, Lukas Singer
+License: WTFPL (see COPYING or <http://www.wtfpl.net/>)
+Description: Runs renders in the background so the ui does not freeze.
+"""
+
+import threading
+
+import render
+
+
+class RenderJob(object):
+    """ runs a render function like mandelbrot.mandelbrot in a background
+    thread. the function gets the keyword argument progress, so the job can
+    pick up the partial plane and stop the render when it is cancelled.
+    the ui has to poll the job, tkinter must not be touched from the thread.
+    """
+
+    def __init__(self, function, *args, **kwargs):
+        super().__init__()
+        self.plane = None
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.done = False
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run,
+                                        args=(function, args, kwargs),
+                                        daemon=True)
+        self._thread.start()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """ stops the render as soon as the current band is finished """
+        self._cancelled.set()
+
+    def report(self, plane, fraction):
+        """ this is the progress callback passed to the render function """
+        if self.cancelled:
+            raise render.Cancelled()
+        self.plane = plane
+        self.progress = fraction
+
+    def _run(self, function, args, kwargs):
+        try:
+            self.result = function(*args, progress=self.report, **kwargs)
+        except render.Cancelled:
+            pass
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
@@ -9,27 +9,54 @@ Description: Julia set algorithm and coloring.
 """
 
 import complex_plane
+import palette
+import render
+
+# the view showing the whole set (upper left and lower right corner)
+DEFAULT_COORDS = (-2+2j, 2-2j)
 
 def julia(width, height,
           start, end,
           c,
           coloring=None,
           bailout=2.0,
-          itermax=256):
+          itermax=256,
+          engine=None,
+          mode=None,
+          symmetry=None,
+          progress=None,
+          distance=None,
+          precision=None):
+    """ renders the julia set of c with one of the render.ENGINES in one of
+    the render.MODES in one of the render.PRECISIONS (None chooses it from
+    the view). symmetry, progress and distance (the distance estimation, on
+    by default for distance colorings) are passed to render.render().
+    start and end may be deep_zoom.Points for deep zooms.
+    """
     cp = complex_plane.ComplexPlane(width, height, start, end)
     if not coloring:
-        def coloring(c, z, m, i):
-            if i >= m:
-                return (0, 0, 0)
-            elif i % 2 == 0:
-                return (255, 0, 0)
-            else:
-                return (0, 0, 255)
-    for z0, px in cp:
-        zn = z0
-        i = 0
-        while abs(zn) < bailout and i < itermax:
-            zn = zn * zn + c
-            i += 1
-        cp.set_pixel(px, coloring(c, zn, itermax, i))
+        coloring = DEFAULT_COLORING
+    render.render(cp, coloring, bailout, itermax, c,
+                  engine=engine, mode=mode, symmetry=symmetry,
+                  progress=progress, distance=distance,
+                  precision=precision)
+    return cp
+
+def recolor(cp, coloring=None):
+    """ colors the already rendered julia set cp again """
+    palette.colorize(cp, coloring or DEFAULT_COLORING)
     return cp
+
+def resume(cp, itermax, coloring=None, engine=None, mode=None,
+           progress=None):
+    """ iterates the already rendered julia set cp on to the higher
+    itermax and colors it again, see render.resume()
+    """
+    render.resume(cp, coloring or DEFAULT_COLORING, itermax,
+                  engine=engine, mode=mode, progress=progress)
+    return cp
+
+DEFAULT_COLORING = palette.palette_coloring(palette.modulo_palette(
+    (0, 0, 0),
+    (255, 0, 0),
+    (0, 0, 255)))
@@ -11,36 +11,58 @@ Description: Mandelbrot set algorithm and coloring.
 import time
 
 import complex_plane
+import palette
+import render
+
+# the view showing the whole set (upper left and lower right corner)
+DEFAULT_COORDS = (-2.2+1.4j, 1-1.4j)
 
 def mandelbrot(width, height,
                start, end,
                coloring=None,
                bailout=2.0,
-               itermax=256):
-    # i found this link. maybe its worth trying it to improve speed.
-    #   http://www.tutorialspoint.com/python/python_further_extensions.htm
-    # HINT: i would just write the code for a single pixel in c.
-    #   the function should/could take the complex number, bailout and iter_max
-    #   and return the number of iterations.
-    t0 = time.clock()
+               itermax=256,
+               engine=None,
+               mode=None,
+               symmetry=None,
+               progress=None,
+               distance=None,
+               precision=None):
+    """ renders the mandelbrot set with one of the render.ENGINES in one of
+    the render.MODES in one of the render.PRECISIONS (None chooses it from
+    the view). symmetry, progress and distance (the distance estimation, on
+    by default for distance colorings) are passed to render.render().
+    start and end may be deep_zoom.Points for deep zooms.
+    """
+    t0 = time.perf_counter()
     cp = complex_plane.ComplexPlane(width, height, start, end)
     if not coloring:
         coloring = DEFAULT_COLORING
-    for c, p in cp:
-        # we should start with z = 0 and i = 0
-        # but after one iteration we always have
-        # z = c and i = 1, so we could start with that
-        # saving one iteration per pixel.
-        z = c
-        i = 1
-        while abs(z) < bailout and i < itermax:
-            z = z * z + c
-            i += 1
-        cp.set_pixel(p, coloring(c, z, itermax, i))
-    t1 = time.clock()
+    render.render(cp, coloring, bailout, itermax,
+                  engine=engine, mode=mode, symmetry=symmetry,
+                  progress=progress, distance=distance,
+                  precision=precision)
+    t1 = time.perf_counter()
     print('rendered mandelbrot in {:.3g} seconds'.format(t1 - t0))
     return cp
 
+def recolor(cp, coloring=None):
+    """ colors the already rendered mandelbrot set cp again """
+    palette.colorize(cp, coloring or DEFAULT_COLORING)
+    return cp
+
+def resume(cp, itermax, coloring=None, engine=None, mode=None,
+           progress=None):
+    """ iterates the already rendered mandelbrot set cp on to the higher
+    itermax and colors it again, see render.resume()
+    """
+    t0 = time.perf_counter()
+    render.resume(cp, coloring or DEFAULT_COLORING, itermax,
+                  engine=engine, mode=mode, progress=progress)
+    t1 = time.perf_counter()
+    print('resumed mandelbrot in {:.3g} seconds'.format(t1 - t0))
+    return cp
+
 ###############################################################################
 ###   COLORING   ##############################################################
 ###############################################################################
@@ -48,34 +70,19 @@ def mandelbrot(width, height,
 # TODO: implement more coloring algorithms:
 #       here are some: http://www.eddaardvark.co.uk/python_patterns/schemes.html
 
-# TODO: refactor so that itermax is not needed as a parameter to the coloring
-#       functions. it is constant and can be passed to the factory function
-#       instead.
-
 # TODO: consider this link when experimenting with colors:
 #       http://stackoverflow.com/questions/24852345/hsv-to-rgb-color-conversion
 
-def modulo_coloring(inside_color, *colors):
-    l = len(colors)
-    def f(complex_coord, complex_value, iter_max, iter_count):
-        if iter_count >= iter_max:
-            return inside_color
-        else:
-            return colors[iter_count % l]
-    return f
+def modulo_coloring(inside_color, *colors, itermax=None):
+    return palette.palette_coloring(
+        palette.modulo_palette(inside_color, *colors),
+        itermax)
 
 def simple_shading(inside_color, start_color, stop_color, iter_max):
-    delta = ((stop_color[0] - start_color[0]) / iter_max,
-             (stop_color[1] - start_color[1]) / iter_max,
-             (stop_color[2] - start_color[2]) / iter_max)
-    def f(complex_coord, complex_value, iter_max, iter_count):
-        if iter_count >= iter_max:
-            return inside_color
-        else:
-            return (int(start_color[0] + iter_count * delta[0]),
-                    int(start_color[1] + iter_count * delta[1]),
-                    int(start_color[2] + iter_count * delta[2]))
-    return f
+    return palette.palette_coloring(
+        palette.shading_palette(inside_color, start_color, stop_color,
+                                iter_max),
+        iter_max)
 
 DEFAULT_COLORING =  modulo_coloring(
     (0, 0, 0),
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+"""
+Filename: metrics.py
+Author: Lukas Singer <lukas42singer (at) gmail (dot) com>
+Created: 2026/10/18
+Copyright: 2026, Lukas Singer
+License: WTFPL (see COPYING or <http://www.wtfpl.net/>)
+Description: Timings and counters of renders.
+
+  every complex plane has got a RenderMetrics object (plane.metrics), the
+  renderer records how long its stages take:
+
+    'cache'     loading and storing the iteration field (see cache.py)
+    'reference' the reference orbit of a deep zoom (see deep_zoom.py)
+    'iterate'   the escape time iteration
+    'color'     the coloring of the iteration field (and the previews)
+    'mirror'    the copies of symmetric views
+    'antialias' the extra samples of the edges (see antialias.py)
+    'image'     the conversion of the pixels to a PIL image
+    'tk image'  the conversion to a tk image
+    'display'   showing the image in the user interface
+
+  and how long every band or tile took. the counters are the statistics of
+  the plane ('iterations' is the number of iteration steps done).
+
+  the stages can be profiled, e.g. the iteration with cProfile:
+
+    profiler = cProfile.Profile()
+    metrics.HOOKS.append(metrics.profiler_hook(profiler, ['iterate']))
+"""
+
+import collections
+import contextlib
+import time
+
+# the hooks called for every stage of every render. a hook is a function
+# taking the name of the stage and returning a context manager wrapping it.
+HOOKS = []
+
+
+class RenderMetrics:
+    """ the metrics of the render of a plane (and its tiles) """
+
+    def __init__(self, plane):
+        super().__init__()
+        self.plane = plane
+        # seconds per stage in the order they were first entered
+        self.stages = collections.OrderedDict()
+        # (x, y, width, height, seconds) of the bands and tiles
+        self.tiles = []
+        # seconds of the whole render
+        self.elapsed = 0.0
+
+    @property
+    def counters(self):
+        """ the statistics of the plane with the number of 'escaped' and
+        'interior' pixels (of the iteration field)
+        """
+        counters = collections.Counter(self.plane.statistics)
+        if self.plane.iterations is not None:
+            interior = int((self.plane.iterations
+                            >= self.plane.itermax).sum())
+            counters['interior'] = interior
+            counters['escaped'] = self.plane.iterations.size - interior
+        return counters
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """ a context manager adding the time spent in it to the stage
+        name. the HOOKS wrap it.
+        """
+        with contextlib.ExitStack() as stack:
+            for hook in HOOKS:
+                stack.enter_context(hook(name))
+            t0 = time.perf_counter()
+            try:
+                yield
+            finally:
+                self.stages[name] = (self.stages.get(name, 0.0)
+                                     + time.perf_counter() - t0)
+
+    def tile(self, x, y, width, height, seconds):
+        """ records the time of a band or tile, x and y are pixel coords of
+        the plane the metrics belong to
+        """
+        self.tiles.append((x, y, width, height, seconds))
+
+    def reset(self):
+        self.stages.clear()
+        del self.tiles[:]
+        self.elapsed = 0.0
+
+    def as_dict(self):
+        """ returns the metrics as a dict (e.g. for json) """
+        return {'elapsed': self.elapsed,
+                'stages': dict(self.stages),
+                'counters': dict(self.counters),
+                'tiles': list(self.tiles)}
+
+    def summary(self):
+        """ returns a short text of the stages and counters """
+        counters = self.counters
+        parts = ['{} {:.3g}s'.format(name, seconds)
+                 for name, seconds in self.stages.items()]
+        if counters['iterations']:
+            parts.append('{:.3g}M iterations'.format(
+                counters['iterations'] / 1e6))
+        if counters['cached']:
+            parts.append('cached')
+        if counters['escaped'] or counters['interior']:
+            parts.append('{:.0%} escaped'.format(
+                counters['escaped']
+                / (counters['escaped'] + counters['interior'])))
+        return ', '.join(parts)
+
+
+def profiler_hook(profiler, stages=None):
+    """ returns a hook (see HOOKS) which runs profiler during the stages
+    (all if None). profiler has got enable() and disable() (cProfile) or
+    start() and stop() (pyinstrument).
+    """
+    if hasattr(profiler, 'enable'):
+        start, stop = profiler.enable, profiler.disable
+    else:
+        start, stop = profiler.start, profiler.stop
+
+    @contextlib.contextmanager
+    def hook(name):
+        if stages is not None and name not in stages:
+            yield
+            return
+        start()
+        try:
+            yield
+        finally:
+            stop()
+    return hook
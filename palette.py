@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+"""
+Filename: palette.py
+Author: Lukas Singer <lukas42singer (at) gmail (dot) com>
+Created: 2026/10/18
+Copyright: 2026, Lukas Singer
+License: WTFPL (see COPYING or <http://www.wtfpl.net/>)
+Description: Palette lookup tables and coloring of whole planes.
+"""
+
+import numpy as np
+
+
+# a palette is a function which takes itermax and returns a table with
+# itermax + 1 rows of (r, g, b) colors as a uint8 array. row i is the color
+# of all pixels with an iteration count of i, so the row itermax is the
+# inside color. a coloring function with a palette attribute can color
+# a whole plane with a single lookup.
+#
+# a histogram palette is a function which takes the histogram of the
+# iteration counts of a plane (see histogram()) and returns the table. the
+# colors of a coloring with a histogram attribute depend on all pixels of
+# the plane (see histogram_coloring()).
+#
+# a coloring with a distance attribute colors by the estimated distances of
+# the pixels to the set (see distance_coloring()), the plane is rendered
+# with distances for it (see render.render()).
+
+# the number of pixels histogram() counts at once
+HISTOGRAM_CHUNK = 2 ** 20
+
+def modulo_palette(inside_color, *colors):
+    """ returns a palette cycling through colors """
+    def palette(itermax):
+        table = np.array(colors, dtype=np.uint8)[
+            np.arange(itermax + 1) % len(colors)]
+        table[itermax] = inside_color
+        return table
+    return palette
+
+def shading_palette(inside_color, start_color, stop_color, iter_max):
+    """ returns a palette going from start_color (iteration 0) to
+    stop_color (iteration iter_max)
+    """
+    start = np.array(start_color, dtype=float)
+    delta = (np.array(stop_color, dtype=float) - start) / iter_max
+    def palette(itermax):
+        i = np.arange(itermax + 1)[:, np.newaxis]
+        # astype truncates like int() does
+        table = np.clip((start + i * delta).astype(int), 0, 255).astype(
+            np.uint8)
+        table[itermax] = inside_color
+        return table
+    return palette
+
+def equalized_palette(inside_color, start_color, stop_color):
+    """ returns a histogram palette going from start_color to stop_color,
+    every shade in between gets about the same number of escaped pixels.
+    """
+    start = np.array(start_color, dtype=float)
+    delta = np.array(stop_color, dtype=float) - start
+    def palette(histogram):
+        itermax = len(histogram) - 1
+        # the fraction of the escaped pixels escaping up to every count
+        cdf = np.cumsum(histogram[:itermax], dtype=float)
+        if itermax and cdf[-1]:
+            cdf /= cdf[-1]
+        table = np.empty((itermax + 1, 3), dtype=np.uint8)
+        table[:itermax] = np.clip(
+            (start + cdf[:, np.newaxis] * delta).astype(int), 0, 255)
+        table[itermax] = inside_color
+        return table
+    return palette
+
+def palette_coloring(palette, itermax=None):
+    """ creates a coloring function from a palette. the tables are
+    cached per itermax, pass itermax to build the table right away.
+    the coloring can still be called per pixel like any other coloring
+    function, but colorize() uses its palette to color whole planes.
+    """
+    tables = {}
+    def table(itermax):
+        if itermax not in tables:
+            tables[itermax] = palette(itermax)
+        return tables[itermax]
+    def f(complex_coord, complex_value, iter_max, iter_count):
+        return tuple(table(iter_max)[min(iter_count, iter_max)].tolist())
+    f.palette = table
+    if itermax is not None:
+        table(itermax)
+    return f
+
+def histogram_coloring(palette):
+    """ creates a coloring function from a histogram palette. it colors
+    whole planes, the table is built from the histogram of all iteration
+    counts of the plane (see colorize()). called per pixel it only knows
+    the one pixel, so every escaped pixel gets the last color.
+    """
+    def f(complex_coord, complex_value, iter_max, iter_count):
+        counts = np.zeros(iter_max + 1, dtype=np.int64)
+        counts[min(iter_count, iter_max)] = 1
+        return tuple(palette(counts)[min(iter_count, iter_max)].tolist())
+    f.histogram = palette
+    return f
+
+def distance_coloring(inside_color, edge_color, outside_color, width=2.0):
+    """ creates a coloring function which colors the pixels closer than
+    width pixels to the set from edge_color (on the edge) to outside_color
+    (width pixels away), the rest outside_color. it shows the filaments of
+    the set which are thinner than a pixel.
+    """
+    inside = np.array(inside_color, dtype=np.uint8)
+    edge = np.array(edge_color, dtype=float)
+    delta = np.array(outside_color, dtype=float) - edge
+    def distance(distances, iterations, itermax):
+        t = np.clip(np.asarray(distances, dtype=float) / width, 0, 1)
+        rgb = (edge + t[..., np.newaxis] * delta).astype(np.uint8)
+        rgb[np.asarray(iterations) >= itermax] = inside
+        return rgb
+    def f(complex_coord, complex_value, iter_max, iter_count):
+        # without the distance every escaped pixel is far away
+        if iter_count >= iter_max:
+            return tuple(inside_color)
+        return tuple(outside_color)
+    f.distance = distance
+    return f
+
+def histogram(iterations, itermax):
+    """ returns the number of pixels with every iteration count from 0 to
+    itermax. the counts are taken HISTOGRAM_CHUNK pixels at a time, so
+    bincount never copies a big field at once.
+    """
+    result = np.zeros(itermax + 1, dtype=np.int64)
+    flat = np.ravel(iterations)
+    for n in range(0, flat.size, HISTOGRAM_CHUNK):
+        result += np.bincount(flat[n:n + HISTOGRAM_CHUNK],
+                              minlength=itermax + 1)
+    return result
+
+def colors(coloring, iterations, itermax, coordinates=None, values=None,
+           distances=None):
+    """ returns the colors of all iteration counts as an array with the
+    shape of iterations plus a last axis of (r, g, b).
+    a coloring with a palette needs nothing more than the iterations.
+    a coloring with a histogram takes the histogram of these iterations.
+    a coloring with a distance needs the distances (in pixels) as well.
+    legacy per pixel coloring functions are called for every pixel, they
+    need the coordinates (an array like iterations or a single complex
+    number for julia sets) and the values (absolute values of the final z).
+    """
+    if hasattr(coloring, 'palette'):
+        return coloring.palette(itermax)[iterations]
+    if hasattr(coloring, 'histogram'):
+        return coloring.histogram(histogram(iterations, itermax))[iterations]
+    if hasattr(coloring, 'distance'):
+        if distances is None:
+            raise ValueError('the coloring needs the distances')
+        return coloring.distance(distances, iterations, itermax)
+    if np.ndim(coordinates) == 0:
+        cs = [coordinates] * iterations.size
+    else:
+        cs = np.ravel(coordinates).tolist()
+    rgb = [coloring(cn, zn, itermax, i) for cn, zn, i in
+           zip(cs, np.ravel(values).tolist(), np.ravel(iterations).tolist())]
+    return np.array(rgb, dtype=np.uint8).reshape(iterations.shape + (3,))
+
+def colorize(plane, coloring, rows=None):
+    """ applies the coloring to the iteration field stored in the complex
+    plane (see ComplexPlane.init_field) and writes the colors to its pixels.
+    rows is a range of rows to color, by default the whole plane is colored.
+    a coloring with a histogram only takes the histogram of the rows, so
+    the whole plane has to be colored once it is complete. a coloring with
+    a distance needs a plane rendered with distances.
+    legacy coloring functions get the absolute value of the final z as
+    complex_value, it is the only part of it every pixel keeps. z itself is
+    nan for the pixels which were filled without iterating them (see the
+    subdivision mode) and is only kept for the pixels inside the set of a
+    cached view (see cache.py).
+    """
+    if rows is None:
+        rows = range(plane.size[1])
+    if (plane.parameter is None and not hasattr(coloring, 'palette')
+        and not hasattr(coloring, 'histogram')
+        and not hasattr(coloring, 'distance')):
+        coordinates = plane.coordinates(rows)
+    else:
+        coordinates = plane.parameter
+    band = slice(rows.start, rows.stop)
+    plane.set_block(0, rows.start, colors(
+        coloring, plane.iterations[band], plane.itermax,
+        coordinates, plane.values[band],
+        None if plane.distances is None
+        else pixel_distances(plane, plane.distances[band])))
+
+def pixel_distances(plane, distances):
+    """ returns the distances (in complex units) in pixels of the plane """
+    return distances / abs(plane.delta.real)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+"""
+Filename: parallel.py
+Author: Lukas Singer <lukas42singer (at) gmail (dot) com>
+Created: 2026/10/18
+Copyright: 2026, Lukas Singer
+License: WTFPL (see COPYING or <http://www.wtfpl.net/>)
+Description: Renders complex planes tile by tile on all cores.
+"""
+
+import collections
+import concurrent.futures
+import multiprocessing
+from multiprocessing import shared_memory
+import time
+
+import numpy as np
+
+import complex_plane
+import double_double
+import escape_time
+
+# number of worker processes, None means one per core.
+WORKERS = None
+# number of rows per tile. small tiles balance the load better, because
+# the inside of the set costs much more than the outside.
+TILE_SIZE = 8
+
+_executor = None
+_executor_workers = None
+
+
+def field(plane, bailout=2.0, itermax=256, parameter=None,
+          workers=None, tile_size=None, precision='double'):
+    """ does exactly the same as escape_time.field(plane.coordinates(), ...)
+    but iterates the tiles in a pool of worker processes (see bands()).
+    """
+    width, height = plane.size
+    z = np.empty((height, width), dtype=complex)
+    counts = np.empty((height, width), dtype=np.uint32)
+    for y, zs, cs in bands(plane, bailout, itermax, parameter,
+                           workers, tile_size, plane.statistics,
+                           precision=precision):
+        z[y:y + len(cs)] = zs
+        counts[y:y + len(cs)] = cs
+    return z, counts
+
+
+def bands(plane, bailout=2.0, itermax=256, parameter=None,
+          workers=None, tile_size=None, statistics=None, timings=None,
+          precision='double'):
+    """ splits the plane into tiles of tile_size rows, iterates them in a
+    pool of worker processes and yields (y, z, counts) for every tile as
+    soon as it is finished. the workers write their results directly into
+    shared memory, so nothing but the tile bounds (and the statistics of
+    escape_time.field, which are added to statistics) is pickled.
+    the seconds the workers spent on the tiles are appended to timings as
+    (x, y, width, height, seconds), see metrics.RenderMetrics.tile().
+    when the generator is closed early the pending tiles are cancelled.
+    precision is 'single', 'double' (see escape_time.field()) or
+    'double-double' (see double_double.field()).
+    """
+    width, height = plane.size
+    tile_size = tile_size or TILE_SIZE
+    shape = (height, width)
+    n = width * height
+    z_shm = shared_memory.SharedMemory(create=True, size=max(n * 16, 1))
+    i_shm = shared_memory.SharedMemory(create=True, size=max(n * 4, 1))
+    futures = {}
+    try:
+        z = np.ndarray(shape, dtype=complex, buffer=z_shm.buf)
+        counts = np.ndarray(shape, dtype=np.uint32, buffer=i_shm.buf)
+        executor = get_executor(workers)
+        for y in range(0, height, tile_size):
+            task = ((z_shm.name, i_shm.name), shape, plane.view,
+                    plane.start, plane.delta, plane.origin,
+                    bailout, itermax, parameter, precision,
+                    y, min(y + tile_size, height))
+            futures[executor.submit(_iterate_tile, task)] = task[-2:]
+        for future in concurrent.futures.as_completed(futures):
+            tile_statistics, seconds = future.result()
+            if statistics is not None:
+                statistics.update(tile_statistics)
+            y0, y1 = futures[future]
+            if timings is not None:
+                timings.append((plane.origin[0], plane.origin[1] + y0,
+                                width, y1 - y0, seconds))
+            # copies, the shared memory is gone after the generator
+            yield y0, z[y0:y1].copy(), counts[y0:y1].copy()
+    finally:
+        for future in futures:
+            future.cancel()
+        z = counts = None
+        for shm in (z_shm, i_shm):
+            shm.close()
+            shm.unlink()
+
+
+def get_executor(workers=None):
+    """ returns the process pool. it is created on the first use and
+    created again if the number of workers changes.
+    """
+    global _executor
+    global _executor_workers
+    workers = workers or WORKERS or multiprocessing.cpu_count()
+    if _executor is None or _executor_workers != workers:
+        shutdown()
+        # spawn instead of fork, the ui has got a tk interpreter and
+        # threads which should not be copied to the workers.
+        _executor = concurrent.futures.ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context('spawn'))
+        _executor_workers = workers
+    return _executor
+
+
+def shutdown():
+    """ stops the worker processes """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+def _iterate_tile(task):
+    (names, shape, view, start, delta, origin,
+     bailout, itermax, parameter, precision, y0, y1) = task
+    t0 = time.perf_counter()
+    z_shm = shared_memory.SharedMemory(name=names[0])
+    i_shm = shared_memory.SharedMemory(name=names[1])
+    try:
+        z = np.ndarray(shape, dtype=complex, buffer=z_shm.buf)
+        counts = np.ndarray(shape, dtype=np.uint32, buffer=i_shm.buf)
+        statistics = collections.Counter()
+        if precision == 'double-double':
+            # the coordinates are computed from the exact view
+            tile = complex_plane.ComplexPlane(
+                shape[1], y1 - y0, start, start, (origin[0], origin[1] + y0),
+                delta)
+            tile.view = view
+            ys, xs = np.indices((y1 - y0, shape[1]))
+            z[y0:y1], counts[y0:y1] = double_double.field(
+                tile, xs, ys, bailout, itermax, parameter, statistics)
+        else:
+            coords = complex_plane.grid(
+                start, delta,
+                np.arange(shape[1]) + origin[0],
+                np.arange(y0, y1) + origin[1])
+            z[y0:y1], counts[y0:y1] = escape_time.field(
+                coords, bailout, itermax, parameter, statistics=statistics,
+                precision=precision)
+        # the views have to be gone before the memory can be closed
+        del z, counts
+        return statistics, time.perf_counter() - t0
+    finally:
+        z_shm.close()
+        i_shm.close()
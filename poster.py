@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+"""
+Filename: poster.py
+Author: Lukas Singer <lukas42singer (at) gmail (dot) com>
+Created: 2026/10/18
+Copyright: 2026, Lukas Singer
+License: WTFPL (see COPYING or <http://www.wtfpl.net/>)
+Description: Renders images which are too big for the memory.
+
+  a poster is rendered tile by tile, every tile is a small complex plane
+  with the coordinates of its part of the whole view. the colors of the
+  finished tiles go into a raw rgb file on disk (a numpy.memmap), so only
+  one tile is in the memory at a time. at the end the raw file is written
+  to a png a few rows at a time.
+
+    poster.poster(60000, 40000, -2.2+1.4j, 1-1.4j, 'poster.png', coloring)
+
+  the raw file and a journal of the finished tiles are kept in a work
+  directory next to the output ('poster.png.parts'). a render which was
+  killed continues with the first unfinished tile when it is started again
+  with the same view and coloring (it starts over if the raw file is
+  missing or cut off). the work directory is removed when the png is
+  done.
+"""
+
+import collections
+import hashlib
+import json
+import os
+import shutil
+import struct
+import zlib
+
+import numpy as np
+
+import complex_plane
+import deep_zoom
+import julia
+import mandelbrot
+import palette
+import render
+
+# the width and height of the tiles in pixels
+TILE_SIZE = 1024
+
+# the number of bytes write_png() compresses at once
+PNG_BAND_SIZE = 2 ** 24
+
+# the files in the work directory
+PIXELS_FILE = 'pixels.rgb'
+JOURNAL_FILE = 'journal'
+
+# the number of iteration counts the colorings are compared with (see
+# _fingerprint())
+FINGERPRINT_SIZE = 257
+
+
+def poster(width, height, start, end, output, coloring, bailout=2.0,
+           itermax=256, parameter=None, engine=None, mode=None,
+           symmetry=None, precision=None, tile_size=TILE_SIZE,
+           directory=None, keep=False, progress=None):
+    """ renders the mandelbrot set (parameter is None) or the julia set of
+    the parameter from start to end (complex numbers or deep_zoom.Points)
+    into the png file output, tile by tile (see the module docstring).
+    the other arguments are the ones of render.render() (None is the
+    default coloring of the fractal).
+    directory is the work directory (output + '.parts' by default), keep
+    keeps it after the png is written.
+    a coloring with a histogram (see palette.histogram_coloring) only
+    knows the histogram of a tile, so the tiles of the poster differ.
+    progress is called with the finished fraction after every tile, it
+    may raise render.Cancelled. the tiles rendered so far are kept and
+    the next render of the same poster continues with the rest.
+    returns the statistics of the tiles rendered by this call.
+    """
+    if not coloring:
+        coloring = (mandelbrot.DEFAULT_COLORING if parameter is None
+                    else julia.DEFAULT_COLORING)
+    directory = directory or output + '.parts'
+    os.makedirs(directory, exist_ok=True)
+    job = {'width': width, 'height': height,
+           'start': str(deep_zoom.Point.from_complex(start)),
+           'end': str(deep_zoom.Point.from_complex(end)),
+           'bailout': bailout, 'itermax': itermax,
+           'parameter': (None if parameter is None
+                         else [parameter.real, parameter.imag]),
+           # the engines and the symmetry give the same pixels
+           'mode': mode or render.DEFAULT_MODE, 'precision': precision,
+           'coloring': _fingerprint(coloring, itermax),
+           'tile_size': tile_size}
+    journal_file = os.path.join(directory, JOURNAL_FILE)
+    pixels_file = os.path.join(directory, PIXELS_FILE)
+    if (os.path.exists(journal_file)
+        and (not os.path.exists(pixels_file)
+             or os.path.getsize(pixels_file) != width * height * 3)):
+        # the finished tiles of the journal are lost with their pixels
+        os.remove(journal_file)
+    done = _journal(journal_file, job)
+    pixels = _pixels(pixels_file, width, height, not done)
+    view = (start, end, width, height)
+    delta = complex_plane.pixel_delta(start, end, width, height)
+    tiles = [(x, y, min(tile_size, width - x), min(tile_size, height - y))
+             for y in range(0, height, tile_size)
+             for x in range(0, width, tile_size)]
+    statistics = collections.Counter()
+    with open(journal_file, 'a') as journal:
+        for n, (x, y, w, h) in enumerate(tiles):
+            if (x, y) not in done:
+                tile = _tile(view, delta, x, y, w, h)
+                render.render(tile, coloring, bailout, itermax, parameter,
+                              engine, mode, symmetry, precision=precision)
+                pixels[y:y + h, x:x + w] = tile.pixels[:, :, :3]
+                # the tile is on the disk before it is in the journal
+                pixels.flush()
+                journal.write('{} {}\n'.format(x, y))
+                journal.flush()
+                os.fsync(journal.fileno())
+                statistics.update(tile.statistics)
+            if progress:
+                progress((n + 1) / len(tiles))
+    write_png(output, pixels)
+    del pixels
+    if not keep:
+        shutil.rmtree(directory)
+    return statistics
+
+
+def _tile(view, delta, x, y, w, h):
+    """ returns the plane of the w x h pixels at (x, y) of the view, with
+    the same coordinates as the pixels of a plane of the whole view
+    """
+    start = complex(view[0])
+    tile = complex_plane.ComplexPlane(
+        w, h, start,
+        start + complex((x + w) * delta.real, (y + h) * delta.imag),
+        (x, y), delta)
+    tile.view = view
+    return tile
+
+
+def _fingerprint(coloring, itermax):
+    """ returns a hash of the colors the coloring gives a fixed sample of
+    iteration counts (and values, coordinates and distances), the tiles of
+    different colorings must not end up in the same poster.
+    """
+    counts = np.unique(np.linspace(0, itermax, FINGERPRINT_SIZE).astype(
+        np.uint32))
+    probe = np.linspace(0.0, 4.0, counts.size)
+    rgb = palette.colors(coloring, counts, itermax, probe - 2 + 1j * probe,
+                         probe, probe)
+    return hashlib.sha256(np.ascontiguousarray(rgb, dtype=np.uint8)
+                          ).hexdigest()
+
+
+def _journal(filename, job):
+    """ returns the (x, y) of the finished tiles of the journal, or starts
+    a new journal for job. raises ValueError if the journal is the one of
+    another job.
+    """
+    job = json.loads(json.dumps(job))
+    if not os.path.exists(filename):
+        with open(filename, 'w') as f:
+            f.write(json.dumps(job) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        return set()
+    with open(filename) as f:
+        lines = f.read().split('\n')
+    if json.loads(lines[0]) != job:
+        raise ValueError('{} belongs to another render'.format(filename))
+    done = set()
+    # the last line may be cut off, if the render was killed
+    for line in lines[1:]:
+        try:
+            x, y = (int(n) for n in line.split())
+        except ValueError:
+            continue
+        done.add((x, y))
+    return done
+
+
+def _pixels(filename, width, height, new):
+    """ returns the raw rgb file as an array (height, width, 3), a new one
+    if new
+    """
+    if new:
+        mode = 'w+'
+    else:
+        mode = 'r+'
+    return np.memmap(filename, dtype=np.uint8, mode=mode,
+                     shape=(height, width, 3))
+
+
+def write_png(filename, pixels, level=6):
+    """ writes pixels, an array (height, width, 3) of uint8 (e.g. a
+    numpy.memmap), to a png file, PNG_BAND_SIZE bytes at a time. the rows
+    are stored with the 'up' filter (the difference to the row above).
+    """
+    height, width = pixels.shape[:2]
+    rows = max(1, PNG_BAND_SIZE // (width * 3))
+    with open(filename, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        # 8 bits per channel, rgb, deflate, adaptive filters, no interlace
+        _chunk(f, b'IHDR', struct.pack('>IIBBBBB', width, height,
+                                       8, 2, 0, 0, 0))
+        compressor = zlib.compressobj(level)
+        previous = np.zeros((1, width * 3), dtype=np.uint8)
+        for y in range(0, height, rows):
+            band = np.asarray(pixels[y:y + rows]).reshape(-1, width * 3)
+            lines = np.empty((len(band), width * 3 + 1), dtype=np.uint8)
+            lines[:, 0] = 2
+            # uint8 arithmetic wraps around like the filter does
+            lines[:1, 1:] = band[:1] - previous
+            lines[1:, 1:] = band[1:] - band[:-1]
+            previous = band[-1:]
+            data = compressor.compress(lines)
+            if data:
+                _chunk(f, b'IDAT', data)
+        _chunk(f, b'IDAT', compressor.flush())
+        _chunk(f, b'IEND', b'')
+
+
+def _chunk(f, kind, data):
+    f.write(struct.pack('>I', len(data)))
+    f.write(kind)
+    f.write(data)
+    f.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(kind))))
@@ -0,0 +1,738 @@
+#!/usr/bin/env python
+"""
+Filename: render.py
+Author: Lukas Singer <lukas42singer (at) gmail (dot) com>
+Created: 2026/10/18
+Copyright: 2026, Lukas Singer
+License: WTFPL (see COPYING or <http://www.wtfpl.net/>)
+Description: Renders mandelbrot and julia sets with the different engines.
+"""
+
+import contextlib
+import time
+
+import numpy as np
+
+import cache
+import complex_plane
+import deep_zoom
+import double_double
+import escape_time
+import palette
+import parallel
+
+# the engines which can be used to render a complex plane.
+#   'numpy':    iterates whole bands of rows at once (see escape_time.py).
+#   'parallel': the numpy engine on all cores (see parallel.py).
+#   'python':   the original pixel by pixel loop.
+#   'perturbation': for deep zooms, see deep_zoom.py. it is used in any
+#               mode and chosen automatically when the pixels get too
+#               close for double-doubles (see PRECISIONS).
+ENGINES = ('numpy', 'parallel', 'python', 'perturbation')
+DEFAULT_ENGINE = 'numpy'
+
+# the modes in which a plane can be rendered.
+#   'bands':       row by row from top to bottom with any of the ENGINES.
+#   'progressive': coarse to fine, every 8th, 4th, 2nd pixel first
+#                  (see PROGRESSIVE_STEPS), with block previews.
+#   'subdivision': mariani-silver, rectangles with a border of a single
+#                  iteration count are filled without iterating them.
+MODES = ('bands', 'progressive', 'subdivision')
+DEFAULT_MODE = 'bands'
+
+# the precisions the pixels can be iterated with.
+#   'single':        floats of 32 bits, faster than doubles, but a few
+#                    iteration counts on the edges differ. it is never
+#                    chosen by default, only when it is asked for, and
+#                    only for views whose pixels are at least
+#                    SINGLE_THRESHOLD apart (relative to their
+#                    coordinates), the deeper ones get doubles.
+#   'double':        floats of 64 bits, like python's complex numbers.
+#   'double-double': sums of two doubles, for zooms just past doubles, see
+#                    double_double.py.
+#   'arbitrary':     the perturbation engine, for the deeper zooms.
+# by default a view gets doubles, or the cheapest higher precision which
+# can tell its pixels apart (see choose_precision()). the 'python' engine
+# iterates doubles, double-doubles with the numpy engine.
+PRECISIONS = ('single', 'double', 'double-double', 'arbitrary')
+# like deep_zoom.DEEP_ZOOM_THRESHOLD for doubles, about 500 times the
+# resolution of a float of 32 bits
+SINGLE_THRESHOLD = 5e-5
+
+# number of rows the numpy engine iterates at once. the progress callback
+# is called after every band, so the ui can show the partial image.
+BAND_SIZE = 32
+
+# the number of pixels fill() iterates at once. every iteration step has got
+# a fixed cost, so fewer but bigger calls are faster, as long as the arrays
+# fit into the memory.
+FILL_SIZE = 2 ** 18
+
+# the grids of the progressive mode, every step has to be the half of
+# the step before.
+PROGRESSIVE_STEPS = (8, 4, 2, 1)
+
+# views which are symmetric are only rendered in parts, the rest is
+# mirrored. the mandelbrot set is symmetric to the real axis, the (quadratic)
+# julia sets are point symmetric to 0. the mirror axis may be this far (in
+# pixels) off the pixel grid.
+DEFAULT_SYMMETRY = True
+SYMMETRY_TOLERANCE = 1e-6
+
+# rectangles of the subdivision mode which are not wider or higher than
+# this are iterated pixel by pixel instead of being divided again.
+SUBDIVISION_MIN_SIZE = 8
+
+# with distances the subdivision mode fills rectangles which are at least
+# this far (in pixels) away from the set without iterating them. distance
+# colorings (see palette.distance_coloring) up to this width show them
+# exactly like the iterated pixels.
+SUBDIVISION_DISTANCE = 4
+
+
+# the automatic max_iter (see estimate_itermax()) of a view is at least
+# AUTO_MIN for every decade the view is smaller than AUTO_WIDTH (about the
+# size of the whole mandelbrot set) and at most AUTO_MAX. the view is
+# probed on a grid of AUTO_SAMPLES points, up to AUTO_TOLERANCE of them
+# may escape after max_iter. if none of them escapes, the probe looks for
+# escaping points up to AUTO_SEARCH times the least max_iter.
+AUTO_SAMPLES = (48, 32)
+AUTO_MIN = 64
+AUTO_WIDTH = 4.0
+AUTO_MAX = 2 ** 20
+AUTO_TOLERANCE = 0.002
+AUTO_SEARCH = 32
+
+
+class Cancelled(Exception):
+    """ raised by a progress callback to stop a render """
+
+
+def render(plane, coloring, bailout=2.0, itermax=256, parameter=None,
+           engine=None, mode=None, symmetry=None, progress=None,
+           distance=None, precision=None):
+    """ iterates and colors the complex plane in one of the MODES. renders
+    the mandelbrot set when parameter is None, otherwise the julia set with
+    c = parameter. the modes other than 'bands' always use the numpy engine.
+    the pixels are iterated with one of the PRECISIONS, doubles (or more
+    for deep zooms) if precision is None (see choose_precision()). the
+    'arbitrary' precision always uses the perturbation engine and the
+    perturbation engine always uses it. with symmetry (DEFAULT_SYMMETRY if
+    None) only the unique part of a symmetric view is rendered.
+    with distance the estimated distances of the pixels to the set are
+    stored in plane.distances (see escape_time.distances()), by default if
+    the coloring needs them. the 'parallel' and 'python' engines can't
+    estimate distances, the numpy engine is used instead.
+    progress is called with the plane and the finished fraction after
+    every band. it may raise Cancelled to stop the render.
+    the time of the render, of its stages and of every band is recorded in
+    plane.metrics (see metrics.py).
+    with a cache (see cache.py) a view which was rendered before is not
+    iterated again, its iteration field is loaded and colored.
+    """
+    t0 = time.perf_counter()
+    if distance is None:
+        distance = hasattr(coloring, 'distance')
+    approximate = (mode or DEFAULT_MODE) == 'subdivision'
+    if engine == 'perturbation':
+        precision = 'arbitrary'
+    precision = choose_precision(plane, precision)
+    if engine == 'python' and precision == 'single':
+        # the pixel loop iterates python's complex numbers
+        precision = 'double'
+    try:
+        if cache.load(plane, bailout, itermax, parameter, distance,
+                      approximate, precision):
+            with plane.metrics.stage('color'):
+                palette.colorize(plane, coloring)
+            if progress:
+                progress(plane, 1.0)
+            return plane
+        _render(plane, coloring, bailout, itermax, parameter,
+                engine, mode, symmetry, progress, distance, precision)
+        if hasattr(coloring, 'histogram'):
+            # the parts were colored by their own histograms
+            with plane.metrics.stage('color'):
+                palette.colorize(plane, coloring)
+        cache.store(plane, approximate)
+        return plane
+    finally:
+        plane.metrics.elapsed += time.perf_counter() - t0
+
+
+def _render(plane, coloring, bailout, itermax, parameter,
+            engine, mode, symmetry, progress, distance, precision):
+    if precision == 'arbitrary':
+        engine = 'perturbation'
+    engine = engine or DEFAULT_ENGINE
+    if engine == 'python' and precision == 'double-double':
+        engine = 'numpy'
+    if distance and engine in ('parallel', 'python'):
+        engine = 'numpy'
+    mode = mode or DEFAULT_MODE
+    if symmetry is None:
+        symmetry = DEFAULT_SYMMETRY
+    plane.init_field(itermax, parameter, bailout, distance, precision)
+    # the mirror axis of deeper zooms can't be found with doubles
+    if symmetry and precision in ('single', 'double'):
+        mirror = _mirror(plane, parameter)
+        if mirror:
+            return _render_symmetric(plane, coloring, bailout, itermax,
+                                     parameter, engine, mode, progress,
+                                     distance, precision, *mirror)
+    evaluate = evaluator(plane, bailout, itermax, parameter, engine)
+    if mode == 'progressive':
+        return _render_progressive(plane, coloring, itermax, parameter,
+                                   evaluate, progress)
+    elif mode == 'subdivision':
+        return _render_subdivision(plane, coloring, itermax, parameter,
+                                   evaluate, progress)
+    elif mode != 'bands':
+        raise ValueError(mode)
+    if engine in ('numpy', 'perturbation'):
+        bands = _numpy_bands(plane, evaluate)
+    elif engine == 'parallel':
+        bands = parallel.bands(plane, bailout, itermax, parameter,
+                               statistics=plane.statistics,
+                               timings=plane.metrics.tiles,
+                               precision=precision)
+    elif engine == 'python':
+        bands = _python_bands(plane, bailout, itermax, parameter)
+    else:
+        raise ValueError(engine)
+    height = plane.size[1]
+    done = 0
+    with contextlib.closing(bands):
+        for y, *result in _timed(bands, plane.metrics, 'iterate'):
+            counts = result[1]
+            _store(plane, slice(y, y + len(counts)), result)
+            plane.statistics['iterated'] += counts.size
+            with plane.metrics.stage('color'):
+                palette.colorize(plane, coloring, range(y, y + len(counts)))
+            done += len(counts)
+            if progress:
+                progress(plane, done / height)
+    return plane
+
+
+def choose_precision(plane, precision=None):
+    """ returns the precision (one of PRECISIONS) the plane is iterated
+    with: precision, 'double' if it is None. views which are too deep for
+    it get a higher one, 'double' if they are too deep for singles (see
+    SINGLE_THRESHOLD), 'double-double' if they are too deep for doubles
+    (see deep_zoom.py) and 'arbitrary' if they are too deep for
+    double-doubles (see double_double.THRESHOLD). the tiles of a plane get
+    the precision of the whole view.
+    """
+    if precision is not None and precision not in PRECISIONS:
+        raise ValueError(precision)
+    # the exact delta, the one of the plane is 0 if the corners are rounded
+    # to the same complex number
+    start, delta, digits = deep_zoom.frame(plane)
+    scale = max(abs(complex(start)), abs(complex(plane.view[1])), 1.0)
+    pixel = min(abs(float(delta.real)), abs(float(delta.imag))) / scale
+    if precision is None:
+        precision = 'double'
+    if precision == 'arbitrary':
+        return precision
+    if pixel < SINGLE_THRESHOLD and precision == 'single':
+        precision = 'double'
+    if pixel < deep_zoom.DEEP_ZOOM_THRESHOLD and precision != 'double-double':
+        precision = 'double-double'
+    if pixel < double_double.THRESHOLD:
+        return 'arbitrary'
+    return precision
+
+
+def estimate_itermax(width, height, start, end, bailout=2.0,
+                     parameter=None):
+    """ returns the max_iter for a render of the view (see render()): the
+    smallest one which is high enough for the points of a sparse probe of
+    the view (see AUTO_SAMPLES). the probe is iterated with a limit twice
+    the least max_iter of the depth of the view (see AUTO_MIN), which is
+    doubled as long as more than AUTO_TOLERANCE of the points escape in
+    its upper half, or none escape at all (see AUTO_SEARCH). the max_iter
+    lets all but AUTO_TOLERANCE of the points which escaped escape.
+    deep zooms are probed in their precision (see choose_precision()),
+    the other views with doubles. only the points which did not escape are
+    iterated on with the doubled limit.
+    """
+    plane = complex_plane.ComplexPlane(width, height, start, end)
+    columns, rows = AUTO_SAMPLES
+    ys, xs = np.meshgrid((np.arange(rows) + 0.5) * height / rows,
+                         (np.arange(columns) + 0.5) * width / columns,
+                         indexing='ij')
+    # the delta of the plane is 0 if the corners are rounded to the same
+    # complex number
+    delta = deep_zoom.frame(plane)[1]
+    depth = max(0.0, np.log10(AUTO_WIDTH / abs(float(delta.real) * width)))
+    least = int(AUTO_MIN * (1 + depth))
+    limit = min(2 * least, AUTO_MAX)
+    deep = deep_zoom.is_deep(plane)
+    if deep:
+        probe = _deep_probe(plane, xs, ys, bailout, limit, parameter)
+        counts = probe(limit)
+    else:
+        coordinates = plane.points(xs, ys)
+        z, counts = escape_time.field(coordinates, bailout, limit, parameter)
+    allowed = int(AUTO_TOLERANCE * counts.size)
+    while limit < AUTO_MAX:
+        late = ((counts > limit // 2) & (counts < limit)).sum()
+        escaped = (counts < limit).sum()
+        if late <= allowed and (escaped > allowed
+                                or limit >= AUTO_SEARCH * least):
+            break
+        previous, limit = limit, min(2 * limit, AUTO_MAX)
+        if deep:
+            counts = probe(limit)
+        else:
+            inside = counts >= previous
+            z[inside], counts[inside] = escape_time.resume(
+                z[inside], previous, coordinates[inside], bailout, limit,
+                parameter)
+    escaped = np.sort(counts[counts < limit])
+    if escaped.size <= allowed:
+        return least
+    # a count of max_iter does not escape
+    return int(min(max(least, escaped[-allowed - 1] + 1), AUTO_MAX))
+
+
+def _deep_probe(plane, xs, ys, bailout, itermax, parameter):
+    """ returns a function probe(itermax) for estimate_itermax() which
+    iterates the pixels (xs[n], ys[n]) of the deep zoom plane in its
+    precision (see choose_precision()) up to itermax, at least the one
+    given here, and returns their iteration counts. only the pixels which
+    did not escape in the last call are iterated again. the 'arbitrary'
+    precision extends a single reference orbit and resumes them, the
+    double-doubles start them over.
+    """
+    shape = np.shape(xs)
+    counts = np.zeros(shape, dtype=np.uint32)
+    # the limit of the last call
+    limits = [0]
+    if choose_precision(plane) == 'arbitrary':
+        reference = deep_zoom.Reference(plane, bailout, itermax, parameter)
+        differences = np.zeros(shape, dtype=complex)
+        indices = np.zeros(shape, dtype=int)
+        def iterate(inside, itermax):
+            reference.extend(itermax)
+            if limits[0]:
+                result = reference.resume(plane, xs[inside], ys[inside],
+                                          differences[inside],
+                                          indices[inside], limits[0])
+            else:
+                result = reference.field(plane, xs[inside], ys[inside],
+                                         differences=True)
+            counts[inside], differences[inside], indices[inside] = result[1:]
+    else:
+        def iterate(inside, itermax):
+            counts[inside] = double_double.field(
+                plane, xs[inside], ys[inside], bailout, itermax,
+                parameter)[1]
+    def probe(itermax):
+        iterate(counts >= limits[0], itermax)
+        limits[0] = itermax
+        return counts
+    return probe
+
+
+def fill(plane, bailout, itermax, parameter, known, engine=None):
+    """ iterates the pixels of the plane which are not known (a boolean
+    mask of the pixels whose iteration field is already set, e.g. copied
+    from another plane), FILL_SIZE pixels at once. the plane is not
+    colored, use palette.colorize afterwards. the engines other than
+    'perturbation' iterate with the numpy engine, in the precision of the
+    field. the field has to be initialized with plane.init_field().
+    """
+    evaluate = evaluator(plane, bailout, itermax, parameter,
+                         engine or DEFAULT_ENGINE)
+    unknown_ys, unknown_xs = np.nonzero(~known)
+    for n in range(0, unknown_ys.size, FILL_SIZE):
+        ys = unknown_ys[n:n + FILL_SIZE]
+        xs = unknown_xs[n:n + FILL_SIZE]
+        with plane.metrics.stage('iterate'):
+            _store(plane, (ys, xs), evaluate(xs, ys))
+        plane.statistics['iterated'] += ys.size
+    return plane
+
+
+def _store(plane, index, result):
+    """ stores the result of an evaluate() (see evaluator()) in the field
+    of the pixels index
+    """
+    plane.iterations[index] = result[1]
+    plane.values[index] = np.abs(result[0])
+    plane.z[index] = result[0]
+    if plane.distances is not None:
+        plane.distances[index] = result[2]
+
+
+def resume(plane, coloring, itermax, engine=None, mode=None,
+           progress=None):
+    """ iterates the rendered plane on to a higher itermax and colors it
+    again. only the pixels which did not escape are iterated, from their
+    final z on (see escape_time.resume()), the iteration counts are the
+    ones of a new render with itermax.
+    planes iterated with more than doubles and planes with distances are
+    rendered again with the engine in the mode (see render()), the reference
+    orbit, the low parts of the double-doubles and the derivatives are not
+    kept. so is the plane, if itermax is not higher.
+    progress is called when the plane is done.
+    """
+    precision = choose_precision(plane, plane.precision)
+    if (itermax <= plane.itermax or plane.distances is not None
+        or precision not in escape_time.DTYPES):
+        return render(plane, coloring, plane.bailout, itermax,
+                      plane.parameter, engine, mode, progress=progress,
+                      precision=plane.precision)
+    t0 = time.perf_counter()
+    try:
+        with plane.metrics.stage('iterate'):
+            ys, xs = np.nonzero(plane.iterations >= plane.itermax)
+            z, counts = escape_time.resume(
+                plane.z[ys, xs], plane.itermax, plane.points(xs, ys),
+                plane.bailout, itermax, plane.parameter,
+                statistics=plane.statistics, precision=precision)
+        if itermax >= 2 ** 16 and plane.iterations.dtype == np.uint16:
+            plane.iterations = plane.iterations.astype(np.uint32)
+        plane.itermax = itermax
+        plane.iterations[ys, xs] = counts
+        plane.values[ys, xs] = np.abs(z)
+        plane.z[ys, xs] = z
+        plane.statistics['resumed'] += ys.size
+        with plane.metrics.stage('color'):
+            palette.colorize(plane, coloring)
+        if progress:
+            progress(plane, 1.0)
+        return plane
+    finally:
+        plane.metrics.elapsed += time.perf_counter() - t0
+
+
+# the end of an iterator, see _timed()
+_END = object()
+
+
+def _timed(iterable, metrics, stage):
+    """ yields the items of iterable, the time it takes to get them is
+    added to the stage of the metrics
+    """
+    iterator = iter(iterable)
+    while True:
+        with metrics.stage(stage):
+            item = next(iterator, _END)
+        if item is _END:
+            return
+        yield item
+
+
+def evaluator(plane, bailout, itermax, parameter, engine):
+    """ returns a function evaluate(xs, ys) which iterates the pixels
+    (xs[n], ys[n]) of the plane and returns their final z and iteration
+    counts in the shape of xs, and their distances to the set if the
+    plane has got distances (see ComplexPlane.init_field). the pixel coords
+    may be fractions, to sample points between the pixels. all engines but
+    'perturbation' evaluate with the numpy engine, in the precision of the
+    plane (see choose_precision()).
+    """
+    distance = plane.distances is not None
+    precision = choose_precision(plane, plane.precision)
+    if engine == 'perturbation' or precision == 'arbitrary':
+        # the reference orbit is computed once for all pixels.
+        with plane.metrics.stage('reference'):
+            reference = deep_zoom.Reference(plane, bailout, itermax,
+                                            parameter)
+        def iterate(xs, ys, derivative=False):
+            return reference.field(plane, xs, ys, plane.statistics,
+                                   derivative)
+    elif precision == 'double-double':
+        def iterate(xs, ys, derivative=False):
+            return double_double.field(plane, xs, ys, bailout, itermax,
+                                       parameter, plane.statistics,
+                                       derivative)
+    else:
+        def evaluate(xs, ys):
+            return escape_time.field(plane.points(xs, ys),
+                                     bailout, itermax, parameter,
+                                     statistics=plane.statistics,
+                                     distance=distance, precision=precision)
+        return evaluate
+
+    def evaluate(xs, ys):
+        if not distance:
+            return iterate(xs, ys)
+        z, counts, dz = iterate(xs, ys, derivative=True)
+        if parameter is None:
+            return z, counts, escape_time.distances(
+                z, dz, counts, itermax, plane.points(xs, ys), 'c')
+        return z, counts, escape_time.distances(
+            z, dz, counts, itermax, parameter, 'z')
+    return evaluate
+
+
+def _mirror(plane, parameter):
+    """ returns the pixel ranges of the mirrored part of the plane and the
+    mirror axes (rows, columns, ky, kx): the pixel (x, y) is the mirror
+    image of (kx - x, ky - y). kx is None for the mandelbrot set, which is
+    only mirrored at the real axis. returns None if nothing can be mirrored.
+    """
+    def axis(start, delta, origin):
+        # the pixels n and k - n are mirrored at 0
+        if delta == 0:
+            return None
+        k = -2 * start / delta - 2 * origin
+        if abs(k - round(k)) > SYMMETRY_TOLERANCE:
+            return None
+        return int(round(k))
+    width, height = plane.size
+    ky = axis(plane.start.imag, plane.delta.imag, plane.origin[1])
+    if ky is None:
+        return None
+    rows = range(max(ky // 2 + 1, ky - height + 1, 0), min(ky, height - 1) + 1)
+    if parameter is None:
+        kx = None
+        columns = range(width)
+    else:
+        kx = axis(plane.start.real, plane.delta.real, plane.origin[0])
+        if kx is None:
+            return None
+        columns = range(max(kx - width + 1, 0), min(kx, width - 1) + 1)
+    if not rows or not columns:
+        return None
+    return rows, columns, ky, kx
+
+
+def _render_symmetric(plane, coloring, bailout, itermax, parameter,
+                      engine, mode, progress, distance, precision,
+                      rows, columns, ky, kx):
+    # the plane is rendered in tiles, leaving out the mirrored rows and
+    # columns. the mirror images are taken from the rows above.
+    width, height = plane.size
+    tiles = [(0, 0, width, rows.start),
+             (0, rows.stop, width, height - rows.stop),
+             (0, rows.start, columns.start, len(rows)),
+             (columns.stop, rows.start, width - columns.stop, len(rows))]
+    tiles = [tile for tile in tiles if tile[2] > 0 and tile[3] > 0]
+    total = sum(w * h for x, y, w, h in tiles)
+    done = 0
+    for x, y, w, h in tiles:
+        tile_progress = None
+        if progress:
+            def tile_progress(tile, fraction, done=done, size=w * h):
+                progress(plane, (done + fraction * size) / total)
+        _render(plane.tile(x, y, w, h), coloring, bailout, itermax,
+                parameter, engine, mode, False, tile_progress, distance,
+                precision)
+        done += w * h
+    ys = np.arange(rows.start, rows.stop)
+    xs = np.arange(columns.start, columns.stop)
+    mirrored = np.ix_(ys, xs)
+    original = np.ix_(ky - ys, xs if kx is None else kx - xs)
+    with plane.metrics.stage('mirror'):
+        for array in (plane.iterations, plane.values, plane.distances,
+                      plane.pixels):
+            if array is not None:
+                array[mirrored] = array[original]
+        # the orbits of the mandelbrot set are mirrored as well, the ones
+        # of a julia set end at the same z (z and -z have got the same
+        # square).
+        plane.z[mirrored] = (plane.z[original] if parameter is not None
+                             else np.conj(plane.z[original]))
+    plane.statistics['mirrored'] += ys.size * xs.size
+    if progress:
+        progress(plane, 1.0)
+    return plane
+
+
+def _render_progressive(plane, coloring, itermax, parameter, evaluate,
+                        progress):
+    # every pass computes the pixels on the grid of its step which were not
+    # computed by the pass before, these are two sub grids:
+    #   the even rows (of the grid of the pass before) and the odd columns
+    #   and the odd rows and all columns.
+    # after a pass the not yet computed pixels show the color of the
+    # computed pixel in their upper left.
+    width, height = plane.size
+    done = 0
+    before = None
+    for step in PROGRESSIVE_STEPS:
+        if before is None:
+            grids = [(0, step, 0, step)]
+        else:
+            grids = [(0, before, step, before), (step, before, 0, step)]
+        for y0, dy, x0, dx in grids:
+            ys = range(y0, height, dy)
+            xs = range(x0, width, dx)
+            for n in range(0, len(ys), BAND_SIZE):
+                rows = ys[n:n + BAND_SIZE]
+                _compute_grid(plane, coloring, itermax, parameter, evaluate,
+                              rows, xs)
+                done += len(rows) * len(xs)
+                if progress:
+                    progress(plane, done / (width * height))
+        if step > 1:
+            with plane.metrics.stage('color'):
+                plane.upscale(step)
+            if progress:
+                progress(plane, done / (width * height))
+        before = step
+    return plane
+
+
+def _compute_grid(plane, coloring, itermax, parameter, evaluate, ys, xs):
+    """ iterates and colors the pixels xs times ys, both are ranges """
+    block = (slice(ys.start, ys.stop, ys.step),
+             slice(xs.start, xs.stop, xs.step))
+    with plane.metrics.stage('iterate'):
+        result = evaluate(*np.meshgrid(xs, ys))
+        _store(plane, block, result)
+    z, counts = result[:2]
+    plane.statistics['iterated'] += counts.size
+    with plane.metrics.stage('color'):
+        coordinates = plane.grid(xs, ys) if parameter is None else parameter
+        plane.pixels[block + (slice(0, 3),)] = palette.colors(
+            coloring, counts, itermax, coordinates, np.abs(z),
+            None if plane.distances is None
+            else palette.pixel_distances(plane, result[2]))
+
+
+def _render_subdivision(plane, coloring, itermax, parameter, evaluate,
+                        progress):
+    # mariani-silver: iterate the border of a rectangle, if all pixels of
+    # the border have got the same iteration count, so do all pixels inside.
+    # otherwise the rectangle is divided into four rectangles sharing their
+    # borders. all rectangles of one level are iterated at once.
+    # this is exact for the connected mandelbrot set and connected julia
+    # sets as long as no detail is smaller than a rectangle of the first
+    # levels, it can miss parts of disconnected (dust like) julia sets.
+    # with distances the escaped rectangles are not filled by their border
+    # count, the distances inside would be wrong. but the rectangles with a
+    # border pixel far enough from the set (see SUBDIVISION_DISTANCE) are
+    # filled: no point of the set is closer to a pixel than distance / 4,
+    # so all pixels inside the diagonal escape and are at least that far
+    # away minus the diagonal. they get the lowest count of the border
+    # and are counted as 'far'.
+    width, height = plane.size
+    known = np.zeros((height, width), dtype=bool)
+    rects = [(0, 0, width, height)]
+    pixel = abs(plane.delta.real)
+    while rects:
+        borders = [_border(*rect) for rect in rects]
+        _compute_points(plane, evaluate, known,
+                        np.concatenate([ys for ys, xs in borders]),
+                        np.concatenate([xs for ys, xs in borders]))
+        divided = []
+        inside = []
+        for (x0, y0, x1, y1), (ys, xs) in zip(rects, borders):
+            if x1 - x0 <= 2 or y1 - y0 <= 2:
+                # nothing inside the border
+                continue
+            block = (slice(y0 + 1, y1 - 1), slice(x0 + 1, x1 - 1))
+            counts = plane.iterations[ys, xs]
+            if plane.distances is not None:
+                far = (plane.distances[ys, xs].max() / 4
+                       - np.hypot((x1 - x0) * plane.delta.real,
+                                  (y1 - y0) * plane.delta.imag))
+            if ((counts == counts[0]).all()
+                and (plane.distances is None or counts[0] == itermax)):
+                plane.iterations[block] = counts[0]
+                plane.values[block] = plane.values[ys, xs].mean()
+                known[block] = True
+            elif (plane.distances is not None
+                  and far >= SUBDIVISION_DISTANCE * pixel):
+                plane.iterations[block] = counts.min()
+                plane.values[block] = plane.values[ys, xs].mean()
+                plane.distances[block] = far
+                known[block] = True
+                plane.statistics['far'] += known[block].size
+            elif (x1 - x0 <= SUBDIVISION_MIN_SIZE
+                  or y1 - y0 <= SUBDIVISION_MIN_SIZE):
+                inside.append(np.mgrid[block].reshape(2, -1))
+            else:
+                xm = (x0 + x1) // 2
+                ym = (y0 + y1) // 2
+                divided += [(x0, y0, xm + 1, ym + 1), (xm, y0, x1, ym + 1),
+                            (x0, ym, xm + 1, y1), (xm, ym, x1, y1)]
+        if inside:
+            ys, xs = np.concatenate(inside, axis=1)
+            _compute_points(plane, evaluate, known, ys, xs)
+        rects = divided
+        if progress:
+            with plane.metrics.stage('color'):
+                palette.colorize(plane, coloring)
+            progress(plane, known.sum() / known.size)
+    with plane.metrics.stage('color'):
+        palette.colorize(plane, coloring)
+    return plane
+
+
+def _border(x0, y0, x1, y1):
+    """ returns the ys and xs of the border of the rectangle """
+    xs = np.arange(x0, x1)
+    ys = np.arange(y0 + 1, y1 - 1)
+    return (np.concatenate([np.full(len(xs), y0), np.full(len(xs), y1 - 1),
+                            ys, ys]),
+            np.concatenate([xs, xs,
+                            np.full(len(ys), x0), np.full(len(ys), x1 - 1)]))
+
+
+def _compute_points(plane, evaluate, known, ys, xs):
+    """ iterates the pixels (xs[n], ys[n]) which are not known yet """
+    width = plane.size[0]
+    n = np.unique(ys * width + xs)
+    ys, xs = n // width, n % width
+    new = ~known[ys, xs]
+    ys, xs = ys[new], xs[new]
+    with plane.metrics.stage('iterate'):
+        _store(plane, (ys, xs), evaluate(xs, ys))
+    known[ys, xs] = True
+    plane.statistics['iterated'] += len(ys)
+
+
+def _numpy_bands(plane, evaluate):
+    width, height = plane.size
+    for y in range(0, height, BAND_SIZE):
+        t0 = time.perf_counter()
+        ys, xs = np.mgrid[y:min(y + BAND_SIZE, height), 0:width]
+        result = evaluate(xs, ys)
+        plane.metrics.tile(plane.origin[0], plane.origin[1] + y,
+                           width, len(ys), time.perf_counter() - t0)
+        yield (y,) + tuple(result)
+
+
+def _python_bands(plane, bailout, itermax, parameter):
+    # i found this link. maybe its worth trying it to improve speed.
+    #   http://www.tutorialspoint.com/python/python_further_extensions.htm
+    # HINT: i would just write the code for a single pixel in c.
+    #   the function should/could take the complex number, bailout and iter_max
+    #   and return the number of iterations.
+    width, height = plane.size
+    for y in range(height):
+        t0 = time.perf_counter()
+        steps = 0
+        zs = np.empty((1, width), dtype=complex)
+        counts = np.empty((1, width), dtype=np.uint32)
+        for x in range(width):
+            if parameter is None:
+                # we should start with z = 0 and i = 0
+                # but after one iteration we always have
+                # z = c and i = 1, so we could start with that
+                # saving one iteration per pixel.
+                c = plane.p2c((x, y))
+                z = c
+                i = 1
+            else:
+                c = parameter
+                z = plane.p2c((x, y))
+                i = 0
+            steps -= i
+            while abs(z) < bailout and i < itermax:
+                z = z * z + c
+                i += 1
+            steps += i
+            zs[0, x] = z
+            counts[0, x] = i
+        plane.statistics['iterations'] += steps
+        plane.metrics.tile(plane.origin[0], plane.origin[1] + y,
+                           width, 1, time.perf_counter() - t0)
+        yield y, zs, counts
@@ -8,9 +8,8 @@ License: WTFPL (see COPYING or <http://www.wtfpl.net/>)
 Description: Here are all the settings the user can edit.
 """
 
-import tkinter as tk
-
-import tkinter_ex as tke
+import collections
+import json
 
 
 canvas = None
@@ -21,23 +20,28 @@ coloring = None
 
 def _add_var_getter_property(cls, attr):
     """ this function is used in the settings_class decorator to add a
-    getter for the tk-stringvar and a read/write property to the class.
+    getter for the tk-variable and a read/write property to the class.
     cls:  is the class where the attributes are added.
     attr: is the name of the property and for the get_XYZ_var() method.
     """
-    field = '_' + attr
-    setattr(cls, 'get_{}_var'.format(attr), lambda self: getattr(self, field))
+    setattr(cls, 'get_{}_var'.format(attr), lambda self: self.get_var(attr))
     setattr(cls, attr,
-            property(lambda self: getattr(self, field).get(),
-                     lambda self, value: getattr(self, field).set(value)))
+            property(lambda self: self._values[attr],
+                     lambda self, value: self.set(attr, value)))
 
 def settings_class(cls):
     """ this is the decorator function for SettingsBase subclasses.
-    it adds getters for the tk-stringvars and properties. it reads the
-    names described in the class-variable _SETTINGS.
+    it adds getters for the tk-variables and properties. it reads the
+    names described in the class-variable _SETTINGS. it also adds the
+    class Snapshot, a namedtuple of all settings (see snapshot()).
     """
     for name in cls._SETTINGS:
         _add_var_getter_property(cls, name)
+    cls.Snapshot = collections.namedtuple(
+        cls.__name__.strip('_') + 'Snapshot', cls._SETTINGS,
+        module=cls.__module__)
+    # so pickle finds it
+    cls.Snapshot.__qualname__ = cls.__qualname__ + '.Snapshot'
     return cls
 
 
@@ -51,42 +55,113 @@ class SettingsBase:
       class MySettings(SettingsBase):
           _SETTINGS = {
               'x': 42,
-              'y': 23}
+              'y': 23.0}
 
-    this would result in a class with a _x tk-intvar and a _y tk-doublevar
-    field with the getters get_x_var() and get_y_var() and the properties
-    x and y.
+    this would result in a class with the properties x (an int) and y
+    (a float) and the getters get_x_var() and get_y_var() for a tk-intvar
+    and a tk-doublevar bound to them.
+    the values are plain python values, so reading them is cheap and the
+    settings can be used (and pickled) without tk. the tk-variables are
+    only created when a getter is called for the first time.
     """
 
     _SETTINGS = {}
 
+    # the tk-variable classes for the types of the settings
+    _VARIABLES = {
+        int: 'IntVar',
+        str: 'StringVar',
+        bool: 'BooleanVar',
+        float: 'DoubleVar'}
+
     def __init__(self, **kwargs):
         """ creates the fields described in _SETTINGS and initialize
         eighter from the kwargs or from the default values
         """
         super().__init__()
-        fields = self._SETTINGS.copy()
-        if kwargs:
-            for key in kwargs:
-                if key in fields:
-                    typ = type(fields[key])
-                    fields[key] = typ(kwargs[key])
-                else:
-                    raise KeyError(key)
-        for key in fields:
-            value = fields[key]
-            typ = type(value)
-            name = '_' + key
-            if typ is int:
-                setattr(self, name, tke.IntVar(value))
-            elif typ is str:
-                setattr(self, name, tke.StringVar(value))
-            elif typ is bool:
-                setattr(self, name, tke.BooleanVar(value))
-            elif typ is float:
-                setattr(self, name, tke.DoubleVar(value))
-            else:
+        self._values = self._SETTINGS.copy()
+        self._vars = {}
+        self._observers = []
+        for typ in map(type, self._values.values()):
+            if typ not in self._VARIABLES:
                 raise TypeError(typ)
+        self.update(kwargs)
+
+    def __getstate__(self):
+        # tk-variables and observers are not pickled
+        return {'_values': self._values}
+
+    def __setstate__(self, state):
+        self._values = state['_values']
+        self._vars = {}
+        self._observers = []
+
+    def set(self, name, value):
+        """ sets the setting name to value, converted to the type of its
+        default value. updates the bound tk-variable and calls the observers
+        if the value changed.
+        """
+        self._set(name, value)
+        var = self._vars.get(name)
+        if var is not None:
+            var.set(self._values[name])
+
+    def _set(self, name, value):
+        if name not in self._SETTINGS:
+            raise KeyError(name)
+        value = type(self._SETTINGS[name])(value)
+        if value == self._values[name]:
+            return
+        self._values[name] = value
+        for callback, names in self._observers:
+            if not names or name in names:
+                callback(name, value)
+
+    def update(self, values):
+        """ sets all settings of the dict values """
+        for name in values:
+            if name not in self._SETTINGS:
+                raise KeyError(name)
+        for name, value in values.items():
+            self.set(name, value)
+
+    def get_var(self, name):
+        """ returns the tk-variable bound to the setting name. it is created
+        on the first call (this needs a tk root window), after that the
+        variable and the setting always have the same value.
+        """
+        var = self._vars.get(name)
+        if var is None:
+            import tkinter_ex as tke
+            typ = type(self._SETTINGS[name])
+            var = getattr(tke, self._VARIABLES[typ])(self._values[name])
+            var.trace('w', lambda *_: self._from_var(name))
+            self._vars[name] = var
+        return var
+
+    def _from_var(self, name):
+        try:
+            value = self._vars[name].get()
+        except Exception:
+            # e.g. an entry which is empty while the user types
+            return
+        self._set(name, value)
+
+    def trace(self, callback, *names):
+        """ calls callback(name, value) whenever one of the settings (or
+        one of names) changes
+        """
+        self._observers.append((callback, names))
+
+    def as_dict(self):
+        """ returns all settings as a dict """
+        return self._values.copy()
+
+    def snapshot(self):
+        """ returns an immutable copy of the settings (a namedtuple), e.g.
+        to hand it to a render in another thread or process.
+        """
+        return self.Snapshot(**self._values)
 
 
 @settings_class
@@ -95,7 +170,19 @@ class _Canvas(SettingsBase):
     _SETTINGS = {
         'size_x': 320,
         'size_y': 240,
-        'lock_ratio': True
+        'lock_ratio': True,
+        'mode': 'progressive',
+        # one of render.PRECISIONS or 'auto', see render.choose_precision()
+        'precision': 'auto',
+        # shows the timings of the renders in the status bar
+        'metrics': False,
+        # the anti-aliasing of exported images, see antialias.py.
+        # 0 samples turn it off.
+        'antialias_samples': 8,
+        'antialias_threshold': 32,
+        # the size of the cache of rendered views in MB, see cache.py.
+        # 0 turns it off.
+        'cache_size': 256
         }
 
 
@@ -105,6 +192,8 @@ class _Mandelbrot(SettingsBase):
     _SETTINGS = {
         'bailout': 2.0,
         'max_iter': 128,
+        # estimates max_iter for every view, see render.estimate_itermax()
+        'auto_max_iter': False,
         'coloring': 'Default'
         }
 
@@ -117,6 +206,7 @@ class _Julia(SettingsBase):
         'parameter_imag': 0.75,
         'bailout': 2.0,
         'max_iter': 128,
+        'auto_max_iter': False,
         'coloring': 'Default'
         }
 
@@ -149,6 +239,24 @@ class _Coloring(SettingsBase):
         }
 
 
+_GROUPS = collections.OrderedDict([
+    ('canvas', _Canvas),
+    ('mandelbrot', _Mandelbrot),
+    ('julia', _Julia),
+    ('coloring', _Coloring)
+    ])
+
+# all settings at once, see snapshot()
+Snapshot = collections.namedtuple('Snapshot', _GROUPS)
+
+
+def defaults(group):
+    """ returns the default settings of group ('canvas', 'mandelbrot',
+    'julia' or 'coloring') as a snapshot.
+    """
+    return _GROUPS[group]().snapshot()
+
+
 def initialize():
     global canvas
     global mandelbrot
@@ -160,7 +268,38 @@ def initialize():
     coloring = _Coloring()
 
 
+def snapshot():
+    """ returns an immutable copy of all settings, the groups are the
+    attributes (snapshot().mandelbrot.max_iter).
+    """
+    return Snapshot(**{group: globals()[group].snapshot()
+                       for group in _GROUPS})
+
+
+def save(filename):
+    """ writes all settings to the json file filename """
+    with open(filename, 'w') as f:
+        json.dump({group: globals()[group].as_dict() for group in _GROUPS},
+                  f, indent=2, sort_keys=True)
+
+
+def load(filename):
+    """ reads the settings from the json file filename (see save()). the
+    settings missing in the file keep their values.
+    """
+    with open(filename) as f:
+        values = json.load(f)
+    for group in values:
+        if group not in _GROUPS:
+            raise KeyError(group)
+    if canvas is None:
+        initialize()
+    for group, group_values in values.items():
+        globals()[group].update(group_values)
+
+
 if __name__ == '__main__':
+    import tkinter as tk
     tk.Tk()
     s = _Canvas()
     print(s.get_size_x_var())
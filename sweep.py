@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+Filename: sweep.py
+Author: Lukas Singer <lukas42singer (at) gmail (dot) com>
+Created: 2026/10/18
+Copyright: 2026, Lukas Singer
+License: WTFPL (see COPYING or <http://www.wtfpl.net/>)
+Description: Renders the julia sets of many parameters at once.
+
+  the pixels of the julia sets of several parameters are stacked into one
+  array (parameter, y, x) and iterated together. every iteration step of
+  the numpy engine has got a fixed cost, so small images get a lot faster
+  this way than one julia.julia() after the other.
+
+    planes = sweep.julia_sets(sweep.grid(-2+1.5j, 1-1.5j, 8, 6),
+                              64, 48, -2+2j, 2-2j)
+    sweep.contact_sheet(planes, 8).save('sheet.png')
+"""
+
+import cmath
+import collections
+import time
+
+import numpy as np
+from PIL import Image
+
+import complex_plane
+import escape_time
+import julia
+import palette
+
+# the number of pixels iterated at once, the julia sets of
+# SWEEP_PIXELS // (width * height) parameters are stacked.
+SWEEP_PIXELS = 2 ** 18
+
+
+def grid(start, end, columns, rows):
+    """ returns the parameters in the centers of the columns x rows cells
+    of the rectangle from start (upper left) to end (lower right) of the
+    complex plane, row by row.
+    """
+    cells = complex_plane.ComplexPlane(columns, rows, start, end)
+    return list((cells.coordinates() + cells.delta / 2).ravel())
+
+
+def orbit(center, radius, count):
+    """ returns count parameters on the circle around center """
+    return [center + radius * cmath.exp(2j * cmath.pi * n / count)
+            for n in range(count)]
+
+
+def julia_sets(parameters, width, height, start, end, coloring=None,
+               bailout=2.0, itermax=256, statistics=None):
+    """ yields the rendered planes of the julia sets of all parameters, in
+    their order. the result is the same as julia.julia() with the numpy
+    engine and without symmetry. a distance coloring (see
+    palette.distance_coloring()) gets the distances of the pixels.
+    statistics is a collections.Counter, it gets the counters of the
+    numpy engine, the number of 'pixels' and the 'seconds' spent iterating
+    and coloring (see throughput()).
+    """
+    if coloring is None:
+        coloring = julia.DEFAULT_COLORING
+    if statistics is None:
+        statistics = collections.Counter()
+    distance = hasattr(coloring, 'distance')
+    parameters = np.array([complex(c) for c in parameters], dtype=complex)
+    coordinates = complex_plane.ComplexPlane(width, height,
+                                             start, end).coordinates()
+    batch = max(1, SWEEP_PIXELS // (width * height))
+    for n in range(0, len(parameters), batch):
+        t0 = time.perf_counter()
+        cs = parameters[n:n + batch][:, np.newaxis, np.newaxis]
+        result = escape_time.iterate(
+            np.broadcast_to(coordinates, (len(cs), height, width)),
+            cs, bailout, itermax, 0, escape_time.PERIODICITY_TOLERANCE,
+            statistics, 'z' if distance else None)
+        z, counts = result[:2]
+        if distance:
+            distances = escape_time.distances(z, result[2], counts, itermax,
+                                              cs, 'z')
+        planes = []
+        for k, c in enumerate(cs.ravel()):
+            plane = complex_plane.ComplexPlane(width, height, start, end)
+            plane.init_field(itermax, complex(c), bailout, distance)
+            plane.set_field(counts[k], z[k])
+            if distance:
+                plane.distances[...] = distances[k]
+            palette.colorize(plane, coloring)
+            planes.append(plane)
+        statistics['pixels'] += counts.size
+        statistics['seconds'] += time.perf_counter() - t0
+        yield from planes
+
+
+def throughput(statistics):
+    """ returns the megapixels per second of the statistics of
+    julia_sets()
+    """
+    if not statistics['seconds']:
+        return 0.0
+    return statistics['pixels'] / statistics['seconds'] / 1e6
+
+
+def contact_sheet(planes, columns, spacing=2, background=(0, 0, 0)):
+    """ returns a PIL image of all planes side by side, columns planes in
+    a row, spacing pixels apart.
+    """
+    planes = list(planes)
+    if not planes:
+        raise ValueError('no planes')
+    width, height = planes[0].size
+    rows = (len(planes) + columns - 1) // columns
+    sheet = Image.new('RGB',
+                      (columns * (width + spacing) + spacing,
+                       rows * (height + spacing) + spacing),
+                      background)
+    for n, plane in enumerate(planes):
+        row, column = divmod(n, columns)
+        sheet.paste(plane.get_pil_image().convert('RGB'),
+                    (spacing + column * (width + spacing),
+                     spacing + row * (height + spacing)))
+    return sheet